@@ -4,30 +4,69 @@ __all__ = ['VideoEngines', 'Radar']
 __version__ = '0.3.0'
 __author__ = 'David Johnston'
 
+import math
 import os
 import sys
+import time
 from enum import Enum
-import pint
-if sys.platform == "win32":
-    import ctypes
-
 try:
-    # raise ImportError  # Uncomment to force loading locals
-    from roboradar import config
-    from roboradar.fields import fields, fieldFiles, fieldNames, fieldThemes
-    import roboradar.robots as robots
-    # import roboradar.utils as utils
+    from roboradar import startup
 except ImportError:
-    import config
-    from fields import fields, fieldFiles, fieldNames, fieldThemes
-    import robots
-    # import utils
+    import startup
+
+with startup.phase("imports"):
+    import numpy as np
+    if sys.platform == "win32":
+        import ctypes
+
+    try:
+        # raise ImportError  # Uncomment to force loading locals
+        from roboradar import cache
+        from roboradar import camera
+        from roboradar import config
+        from roboradar import framestats
+        from roboradar import geometry
+        from roboradar import raster
+        from roboradar import scene
+        from roboradar import spatial
+        from roboradar import sprites
+        from roboradar import trail
+        from roboradar.shape_record import AA, FILLED, LINE, OUTLINE, POLYGON
+        from roboradar import units
+        import roboradar.robots as robots
+        # import roboradar.utils as utils
+    except ImportError:
+        import cache
+        import camera
+        import config
+        import framestats
+        import geometry
+        import raster
+        import scene
+        import spatial
+        import sprites
+        import trail
+        from shape_record import AA, FILLED, LINE, OUTLINE, POLYGON
+        import units
+        import robots
+        # import utils
+
+with startup.phase("config"):
+    config.load_config()
+    conf = config.get_config()
+
+with startup.phase("robot discovery"):
+    robotList = robots.getRobots()
 
-config.load_config()
-conf = config.get_config()
-ureg = pint.UnitRegistry()
 
-robotList = robots.getRobots()
+def __getattr__(name):
+    # ureg used to be built at import time. It is still available, but pint
+    # is only loaded if something asks for it.
+    if name == "ureg":
+        return units.get_registry()
+    raise AttributeError(
+        "module {!r} has no attribute {!r}".format(__name__, name)
+        )
 
 
 if (conf["SYSTEM"]["FORCE_RUN_AS_MODULE"]) and __package__ is None:
@@ -52,17 +91,19 @@ VERSION = __version__
 
 
 try:
-    os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
-    import pygame
-    import pygame.gfxdraw
-    import pygame.locals
+    with startup.phase("pygame import"):
+        os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
+        import pygame
+        import pygame.gfxdraw
+        import pygame.locals
     _independent_flags_pygame = pygame.RESIZABLE \
         | pygame.HWSURFACE \
         | pygame.DOUBLEBUF
 except ImportError:
     print("pygame not installed")
 try:
-    import tkinter
+    with startup.phase("tkinter import"):
+        import tkinter
     _independent_flags_tkinter = 0
 except ImportError:
     print("tkinter not installed")
@@ -70,6 +111,36 @@ except ImportError:
 _independent_flags = 0
 
 
+def _camera_event(r, event):
+    '''Mouse and keyboard camera controls of the independent pygame window.
+The wheel zooms, dragging pans, Q and E rotate, F follows the next robot
+(with shift, facing up) and Home shows the whole field again.'''
+    if event.type == pygame.locals.MOUSEWHEEL:
+        r.zoomAt(1.25 ** event.y, pygame.mouse.get_pos())
+    elif event.type == pygame.locals.MOUSEMOTION and event.buttons[0]:
+        r.panPixels(*event.rel)
+    elif event.type == pygame.locals.KEYDOWN:
+        if event.key == pygame.locals.K_q:
+            r.camera.rotateBy(math.radians(15))
+        elif event.key == pygame.locals.K_e:
+            r.camera.rotateBy(math.radians(-15))
+        elif event.key == pygame.locals.K_HOME:
+            r.camera.reset()
+        elif event.key == pygame.locals.K_f and r.scene.dsArray:
+            dsArray = r.scene.dsArray
+            if r.camera.follow in dsArray:
+                i = dsArray.index(r.camera.follow) + 1
+            else:
+                i = 0
+            if i < len(dsArray):
+                r.camera.followDs(
+                    dsArray[i],
+                    bool(event.mod & pygame.locals.KMOD_SHIFT)
+                    )
+            else:
+                r.camera.followDs(None)
+
+
 def _start_independent_pygame(
         flags=_independent_flags,
         engine_flags=_independent_flags_pygame
@@ -97,14 +168,14 @@ flags: flags for pygame.display.set_mode'''
 
         clock = pygame.time.Clock()
 
-        r = Radar(conf["VIDEO"]["SCREEN_DIMENSIONS"])
+        r = Radar(conf["VIDEO"]["SCREEN_DIMENSIONS"], "pygame")
         r.loadField(conf["FIELD"]["NAME"])
-        bb = robotList["BoxBot"]()
-        r.add_ds(bb)
+        for i in range(conf["ROBOT"].get("COUNT", 1)):
+            r.add_ds(robotList[conf["ROBOT"]["NAME"] or "BoxBot"](index=i))
 
-        while True:
-            screen.fill((249, 249, 249))
+        onChange = conf["VIDEO"].get("RENDER_MODE", "fixed") == "on-change"
 
+        while True:
             for event in pygame.event.get():
                 if event.type == pygame.locals.QUIT:
                     pygame.quit()
@@ -115,13 +186,38 @@ flags: flags for pygame.display.set_mode'''
                         (event.w, event.h),
                         pygame.RESIZABLE
                         )
+                if event.type == pygame.locals.VIDEOEXPOSE:
+                    r.invalidate()
+                if event.type == pygame.locals.KEYDOWN \
+                        and event.key == pygame.locals.K_F3:
+                    r.toggleOverlay()
+                _camera_event(r, event)
+
+            # FPS is only a cap in on-change mode, idle frames are skipped.
+            if onChange and not r.needsRender():
+                clock.tick(conf["VIDEO"]["FPS"])
+                continue
 
             # Update.
 
-            screen.blit(r.pygame_render(), (0, 0))
+            frameStart = time.perf_counter()
+            surface = r.pygame_render()
+            if r.dirtyRects:
+                for rect in r.dirty:
+                    screen.blit(surface, rect, rect)
+            else:
+                screen.fill((249, 249, 249))
+                screen.blit(surface, (0, 0))
 
             # Draw.
-            pygame.display.flip()
+            if r.dirtyRects:
+                pygame.display.update(r.dirty)
+            else:
+                pygame.display.flip()
+            r.presented()
+            if startup.first_frame(frameStart):
+                pygame.quit()
+                return
             clock.tick(conf["VIDEO"]["FPS"])
 
 
@@ -145,23 +241,48 @@ flags: flags'''
             self.iconbitmap(__file__[:-11] + "icon.ico")
             self.protocol("WM_DELETE_WINDOW", self.on_exit)
 
-            self.radar = Radar(conf["VIDEO"]["SCREEN_DIMENSIONS"], master=self)
+            self.radar = Radar(
+                conf["VIDEO"]["SCREEN_DIMENSIONS"],
+                "tkinter",
+                master=self
+                )
             self.c = self.radar.tkinter_get_canvas()
             self.c.pack(fill=tkinter.BOTH, expand=1)
+            self._resizeJob = None
             self.c.bind("<Configure>", self.configure)
+            self.bind("<F3>", lambda event: self.radar.toggleOverlay())
             self.radar.loadField(conf["FIELD"]["NAME"])
 
-            self.bb = robotList["BoxBot"]()
-            self.radar.add_ds(self.bb)
+            for i in range(conf["ROBOT"].get("COUNT", 1)):
+                self.radar.add_ds(
+                    robotList[conf["ROBOT"]["NAME"] or "BoxBot"](index=i)
+                    )
+            self.onChange = \
+                conf["VIDEO"].get("RENDER_MODE", "fixed") == "on-change"
 
             self.after(1000 // conf["VIDEO"]["FPS"], self.update)
 
         def update(self, event=None):
-            self.radar.tkinter_render()
+            if not self.onChange or self.radar.needsRender():
+                frameStart = time.perf_counter()
+                self.radar.tkinter_render()
+                self.update_idletasks()
+                self.radar.presented()
+                if startup.first_frame(frameStart):
+                    self.destroy()
+                    return
             self.after(1000 // conf["VIDEO"]["FPS"], self.update)
 
         def configure(self, event=None):
-            self.radar.resize((event.width, event.height))
+            # Canvas items are cheap to move, but a window drag sends a
+            # flood of these, so only the last one in a burst is applied.
+            if self._resizeJob is not None:
+                self.after_cancel(self._resizeJob)
+            self._resizeJob = self.after(
+                int(self.radar.resizeDebounce * 1000),
+                self.radar.resize,
+                (event.width, event.height)
+                )
 
         def on_exit(self):
             self.destroy()
@@ -185,56 +306,252 @@ def start_independent(flags=_independent_flags, engine_flags=0):
 
 
 class Radar:
-    _dsArray = []
+    '''One view of a scene.Scene. Without a scene argument the Radar
+makes its own.'''
+    OVERLAY_INTERVAL = 0.5
+    TRAIL_REBUILD = 0.25
 
     def __init__(
                  self, dimensions=conf["VIDEO"]["SCREEN_DIMENSIONS"],
                  interface=conf["VIDEO"]["ENGINE"],
                  *args, **kwargs):
-        self.cnt = 0
         self.dimensions = dimensions
-        self.fieldIndex = None
-        self.field = None
+        self.scene = kwargs.pop("scene", None)
+        self._ownsScene = self.scene is None
+        if self._ownsScene:
+            self.scene = scene.Scene(kwargs.pop(
+                "batchTransform",
+                conf["VIDEO"].get("BATCH_TRANSFORM", True)
+                ))
+        self._sceneVersion = None
+        self._viewField = None
+        self.camera = camera.Camera()
+        self._cameraView = None
+        self._viewBox = None
+        self.culledShapes = 0
+        self.moveThreshold = kwargs.pop(
+            "moveThreshold",
+            conf["VIDEO"].get("MOVE_THRESHOLD", 0.5)
+            )
+        self._invalid = True
+        self._pendingFrame = None
+        self._lastFrame = None
+        self._antialiasing = kwargs.pop(
+            "antialiasing",
+            conf["VIDEO"]["ANTIALIASING"]
+            )
+        self._filledPolygons = kwargs.pop(
+            "filledPolygons",
+            conf["VIDEO"]["FILLED_POLYGONS"]
+            )
+        self.resizeDebounce = kwargs.pop(
+            "resizeDebounce",
+            conf["VIDEO"].get("RESIZE_DEBOUNCE_MS", 150) / 1000
+            )
+        self._lastResize = None
+        self._staticPending = False
+        self.trailSeconds = kwargs.pop(
+            "trailSeconds",
+            conf["VIDEO"].get("TRAIL_SECONDS", 0)
+            )
+        self._trails = {}
+        self._trailColors = {}
+        self._trailsExpired = 0
+        self.frameStats = None
+        self.showOverlay = False
+        self._overlay = None
+        self._overlayTime = None
+        if kwargs.pop("frameStats", conf["VIDEO"].get("FRAME_STATS", False)) \
+                or conf["VIDEO"].get("FRAME_STATS_DUMP", None):
+            self.enableFrameStats()
         if VideoEngines[interface] is VideoEngines.pygame:
             self._init_pygame(*args, **kwargs)
         elif VideoEngines[interface] is VideoEngines.tkinter:
             self._init_tkinter(*args, **kwargs)
+        elif VideoEngines[interface] is VideoEngines.numpy:
+            self._init_numpy(*args, **kwargs)
+        if conf["VIDEO"].get("FRAME_STATS_OVERLAY", False):
+            self.toggleOverlay()
+
+    @property
+    def fieldIndex(self):
+        return self.scene.fieldIndex
+
+    @property
+    def field(self):
+        return self.scene.field
+
+    @property
+    def compiledField(self):
+        return self.scene.compiledField
+
+    @property
+    def units(self):
+        return self.scene.units
+
+    @property
+    def antialiasing(self):
+        return self._antialiasing
+
+    @antialiasing.setter
+    def antialiasing(self, value):
+        self._antialiasing = value
+        self._styleChanged()
+
+    @property
+    def filledPolygons(self):
+        return self._filledPolygons
+
+    @filledPolygons.setter
+    def filledPolygons(self, value):
+        self._filledPolygons = value
+        self._styleChanged()
+
+    def _styleChanged(self):
+        '''Redraw the static layer in the new style, once there is one.'''
+        if self._viewField is not None:
+            self._resize_engineSpecific()
+            self._pendingFrame = None
+        self.invalidate()
+
+    @property
+    def batchTransform(self):
+        return self.scene.batchTransform
+
+    @batchTransform.setter
+    def batchTransform(self, value):
+        self.scene.batchTransform = value
+        self.scene.invalidate()
 
     def loadField(self, search, *args, **kwargs):
-        if isinstance(search, int) and 0 <= int(search) < len(fields):
-            self.fieldIndex = search
-        else:
-            self.fieldIndex = fieldFiles.get(search, None)
-        if self.fieldIndex is None:
-            self.fieldIndex = fieldNames.get(search, None)
-        if self.fieldIndex is None:
-            self.fieldIndex = fieldThemes.get(search, None)
-        if self.fieldIndex is None:
-            raise ValueError
-        self.field = fields[self.fieldIndex]
-        self.units = self.field.Data["units"]
-        self._unitify(self.field.Data["static-shapes"], self.units)
-        u = ureg(self.units)
-        self.field.Data["width"] = self.field.Data["width"] * u
-        self.field.Data["height"] = self.field.Data["height"] * u
-        self.field.Data["center"] = tuple(
-            i * ureg(self.units) for i in self.field.Data["center"]
-            )
+        '''Load a field into the scene, which every Radar showing it will
+pick up.'''
+        with startup.phase("loadField"):
+            self.scene.loadField(search)
+            self._showField()
+
+    def _showField(self):
+        self._viewField = self.compiledField
         self._loadField_engineSpecific()
+        self._pendingFrame = None
+        self.invalidate()
 
     def resize(self, dimensions):
+        self._lastResize = time.monotonic()
         self.dimensions = dimensions
         self._resize_engineSpecific()
+        self._pendingFrame = None
+        self.invalidate()
+
+    def screenToField(self, point):
+        '''The field point, in meters, under a point of the window.'''
+        x, y, _ = np.linalg.solve(self._transform, (
+            point[0] - self._offset[0],
+            point[1] - self._offset[1],
+            1
+            ))
+        return (float(x), float(y))
+
+    def fieldToScreen(self, point):
+        '''The window pixel showing a field point, in meters.'''
+        (x, y), = geometry.transform_points(
+            self._transform,
+            np.array((point,), dtype=np.float64),
+            self._offset,
+            np.float64
+            ).tolist()
+        return (x, y)
+
+    def panPixels(self, dx, dy):
+        '''Move the camera so the field follows a drag of dx, dy pixels.'''
+        x0, y0 = self.screenToField((0, 0))
+        x1, y1 = self.screenToField((dx, dy))
+        self.camera.pan(x0 - x1, y0 - y1)
+
+    def zoomAt(self, factor, point):
+        '''Zoom the camera by factor, keeping the field under the window
+point point where it is.'''
+        self.camera.zoomBy(factor, self.screenToField(point))
+
+    def enableFrameStats(self):
+        '''Start timing the stages of every frame into self.frameStats (see
+framestats). Timing is off by default.'''
+        if self.frameStats is None:
+            self.frameStats = framestats.FrameStats(
+                conf["VIDEO"].get("FRAME_STATS_FRAMES", 300),
+                conf["VIDEO"].get("FRAME_STATS_DUMP", None),
+                conf["VIDEO"].get("FRAME_STATS_DUMP_INTERVAL", 5)
+                )
+        return self.frameStats
+
+    def toggleOverlay(self):
+        '''Show or hide the fps and frame stage timings in the top left
+corner. Frame stats are turned on if they weren't already. The numpy engine
+has no way to draw text, so it never shows the overlay.'''
+        self.enableFrameStats()
+        self.showOverlay = not self.showOverlay
+        self._overlayTime = None
+        self._toggleOverlay_engineSpecific()
+        self.invalidate()
+
+    def presented(self):
+        '''Call once a rendered frame is on the screen, so the time it took
+to get there is counted too.'''
+        if self.frameStats is not None:
+            self.frameStats.presented()
+
+    def _mark(self, stage):
+        if self.frameStats is not None:
+            self.frameStats.mark(stage)
+
+    def _beginStats(self):
+        if self.frameStats is not None:
+            self.frameStats.begin()
+
+    def _cancelStats(self):
+        if self.frameStats is not None:
+            self.frameStats.cancel()
+
+    def _renderedStats(self):
+        if self.frameStats is not None:
+            self.frameStats.rendered()
+
+    def _overlayLines(self):
+        '''New overlay text, or None if it was refreshed less than
+OVERLAY_INTERVAL ago. Refreshing every frame would be unreadable, and
+slower.'''
+        now = time.monotonic()
+        if self._overlayTime is not None \
+                and now - self._overlayTime < self.OVERLAY_INTERVAL:
+            return None
+        self._overlayTime = now
+        return self.frameStats.format_lines()
 
     def add_ds(self, ds):
-        self._dsArray.append(ds)
-        self._dsArray[-1].number = self.cnt
-        self.cnt += 1
+        self.scene.add_ds(ds)
 
     def _init_pygame(self, *args, **kwargs):
         self._loadField_engineSpecific = self._loadField_pygame
         self._visibleSurface = pygame.Surface(self.dimensions)
         self._resize_engineSpecific = self._resize_pygame
+        self._view_engineSpecific = self._view_pygame
+        self._viewSurface = None
+        self.dirtyRects = kwargs.get(
+            "dirtyRects",
+            conf["VIDEO"].get("DIRTY_RECTS", False)
+            )
+        self.dirty = []
+        self._robotVertices = {}
+        self._robotRects = {}
+        self.spriteCache = None
+        if kwargs.get("sprites", conf["VIDEO"].get("SPRITE_CACHE", True)):
+            self.spriteCache = sprites.SpriteCache(
+                conf["VIDEO"].get("SPRITE_ANGLE_STEP", 1),
+                conf["VIDEO"].get("SPRITE_CACHE_SIZE", 2048)
+                )
+        self._toggleOverlay_engineSpecific = self._toggleOverlay_pygame
+        self._overlayFont = None
+        self._trailLayer = None
 
     def _init_tkinter(self, *args, **kwargs):
         self._loadField_engineSpecific = self._loadField_tkinter
@@ -251,207 +568,935 @@ class Radar:
                 bd=0,
                 highlightthickness=0
                 )
+        self._tkItems = {}
+        self._tkTrails = {}
+        self._tkShown = set()
         self._resize_engineSpecific = self._resize_tkinter
+        self._view_engineSpecific = self._view_tkinter
+        self._toggleOverlay_engineSpecific = self._toggleOverlay_tkinter
+
+    def _init_numpy(self, *args, **kwargs):
+        self._loadField_engineSpecific = self._loadField_numpy
+        self._framebuffer = raster.new_framebuffer(self.dimensions)
+        self._resize_engineSpecific = self._resize_numpy
+        self._view_engineSpecific = self._view_numpy
+        self._viewBuffer = None
+        self._toggleOverlay_engineSpecific = lambda: None
 
     def _loadField_pygame(self):
         self._resize_pygame()
 
     def _loadField_tkinter(self):
         self._canvas.delete("RoboRadar")
+        self._tkItems = {}
+        self._tkTrails = {}
+        self._tkShown = set()
         self._resize_tkinter()
 
+    def _loadField_numpy(self):
+        self._resize_numpy()
+
     def _tkinter_get_name_tag(self, family, name):
         return "RoboRadar-{}-{}".format(family, name)
 
-    def _resize_pygame(self):
-        fd = self.field.Data
+    def _layout(self):
+        '''Fit the field inside dimensions and build the screen transform.
+With the camera away from its default, the view fills the whole window
+instead and the transform comes from the camera.'''
+        cf = self.compiledField
         dimen = self.dimensions
-        self._visibleSurface = pygame.Surface(dimen)
-        self._visibleSurface.fill((0, 0, 0))
-        if fd["width"].magnitude / fd["height"].magnitude <=\
-                dimen[0] / dimen[1]:
+        if cf["width"] / cf["height"] <= dimen[0] / dimen[1]:
             height = dimen[1]
-            width = fd["width"] / fd["height"] * height
+            width = cf["width"] / cf["height"] * height
         else:
             width = dimen[0]
-            height = fd["height"] / fd["width"] * width
+            height = cf["height"] / cf["width"] * width
         self._offset = (
             int((dimen[0] - width) / 2),
             int((dimen[1] - height) / 2)
             )
         self._staticHeight, self._staticWidth = int(height), int(width)
-        self._staticSurface = pygame.Surface(
-            (self._staticWidth,  self._staticHeight)
+        self._transform = geometry.screen_transform(
+            cf,
+            (self._staticWidth, self._staticHeight)
+            )
+        # The fitted view as one window transform, for the camera.
+        self._fit = self._transform.copy()
+        self._fit[:2, 2] += self._offset
+        self.camera.home = (
+            cf["width"] / 2 - cf["center"][0],
+            cf["center"][1] - cf["height"] / 2
+            )
+        self._cameraView = None
+        self._viewBox = None
+        if self.camera.isDefault():
+            return
+        self._offset = (0, 0)
+        self._staticWidth, self._staticHeight = self.dimensions
+        self._transform = self.camera.getMatrix(self._fit, self.scene)
+        self._cameraView = self._transform
+        # What the window can see, in field meters, with a few pixels to
+        # spare for line widths and antialiasing.
+        w, h = self.dimensions
+        corners = np.array((
+            (-4, -4, 1),
+            (w + 4, -4, 1),
+            (-4, h + 4, 1),
+            (w + 4, h + 4, 1)
+            )) @ np.linalg.inv(self._transform).T
+        self._viewBox = spatial.bounds(corners[:, :2])
+
+    def _updateView(self):
+        '''Keep up with the camera. When the view moved since the last
+frame, lay it out again and redraw the static layer for it.'''
+        if self._viewField is None:
+            return
+        if self.camera.isDefault():
+            if self._cameraView is None:
+                return
+            # Back to the fitted view and its cached static layer.
+            self._resize_engineSpecific()
+        else:
+            view = self.camera.getMatrix(self._fit, self.scene)
+            if self._cameraView is not None \
+                    and np.array_equal(view, self._cameraView):
+                return
+            self._view_engineSpecific()
+        self._pendingFrame = None
+        self.invalidate()
+
+    def _visibleStatic(self):
+        '''The static shapes in view, in drawing order. Without a camera
+view that is all of them.'''
+        shapes = self.compiledField["static-shapes"]
+        if self._viewBox is None:
+            return shapes
+        index = spatial.static_index(self.compiledField)
+        return [shapes[i] for i in sorted(index.query(self._viewBox))]
+
+    def _resizing(self):
+        '''True while resize events are still arriving faster than
+resizeDebounce.'''
+        return self._lastResize is not None and \
+            time.monotonic() - self._lastResize < self.resizeDebounce
+
+    def _settleStatic(self):
+        '''Draw the field if another Radar loaded a new one into the scene,
+and replace a placeholder static layer once resizing has stopped.'''
+        if self.compiledField is not self._viewField:
+            self._showField()
+        elif self._staticPending and not self._resizing():
+            self._resize_engineSpecific()
+            self._pendingFrame = None
+            self.invalidate()
+
+    def _staticLayer(self, engine, ext, rasterize, placeholder, loader,
+                     saver):
+        '''Return the static layer for the current size.
+Layers come from cache.staticLayers, then the disk cache, and are only
+rasterized when both miss. While the window is still being resized a
+rescaled placeholder is returned instead, and the real layer is made by
+_settleStatic once things calm down.'''
+        cf = self.compiledField
+        key = (
+            engine,
+            cf["file"],
+            cf["version"],
+            self._staticWidth,
+            self._staticHeight,
+            self.antialiasing,
+            self.filledPolygons
+            )
+        self._staticPending = False
+        layer = cache.staticLayers.get(key)
+        if layer is not None:
+            return layer
+        path = cache.disk_path(key, VERSION, ext)
+        layer = cache.load(path, loader)
+        if layer is not None:
+            cache.staticLayers.put(key, layer)
+            return layer
+        if self._resizing():
+            layer = placeholder()
+            if layer is not None:
+                self._staticPending = True
+                return layer
+        layer = rasterize()
+        cache.staticLayers.put(key, layer)
+        cache.save(path, layer, saver)
+        return layer
+
+    def _resize_pygame(self):
+        self._layout()
+        self._visibleSurface = pygame.Surface(self.dimensions)
+        self._visibleSurface.fill((0, 0, 0))
+        if self._cameraView is not None:
+            self._view_pygame()
+            return
+        size = (self._staticWidth, self._staticHeight)
+        previous = getattr(self, "_staticSurface", None)
+
+        def rasterize():
+            surface = pygame.Surface(size)
+            for shape in self.compiledField["static-shapes"]:
+                self._pygame_draw(shape, surface)
+            return surface
+
+        def placeholder():
+            if previous is None:
+                return None
+            return pygame.transform.scale(previous, size)
+
+        self._staticSurface = self._staticLayer(
+            "pygame",
+            ".png",
+            rasterize,
+            placeholder,
+            pygame.image.load,
+            pygame.image.save
             )
-        for shape in fd["static-shapes"]:
-            self._pygame_draw(shape, self._staticSurface)
+        self._trailLayer = None
+        self._fullRedraw = True
+
+    def _view_pygame(self):
+        '''Redraw the static layer for the camera. It only holds the static
+shapes in view and changes whenever the camera moves, so it is drawn into
+one surface of this Radar's own instead of being cached.'''
+        self._layout()
+        surface = self._viewSurface
+        if surface is None or surface.get_size() != tuple(self.dimensions):
+            surface = pygame.Surface(self.dimensions)
+            self._viewSurface = surface
+        surface.fill((0, 0, 0))
+        for shape in self._visibleStatic():
+            self._pygame_draw(shape, surface)
+        self._staticSurface = surface
+        self._staticPending = False
+        self._trailLayer = None
+        self._fullRedraw = True
+
+    def _resize_numpy(self):
+        self._layout()
+        self._framebuffer = raster.new_framebuffer(self.dimensions)
+        if self._cameraView is not None:
+            self._view_numpy()
+            return
+        size = (self._staticWidth, self._staticHeight)
+        previous = getattr(self, "_staticBuffer", None)
+
+        def rasterize():
+            buf = raster.new_framebuffer(size)
+            for shape in self.compiledField["static-shapes"]:
+                self._numpy_draw(shape, buf)
+            return buf
+
+        def placeholder():
+            if previous is None or not previous.size:
+                return None
+            return raster.rescale(previous, size)
+
+        def loader(path):
+            buf = np.load(path)
+            if buf.shape != (size[1], size[0], 3):
+                return None
+            return buf
+
+        self._staticBuffer = self._staticLayer(
+            "numpy",
+            ".npy",
+            rasterize,
+            placeholder,
+            loader,
+            lambda buf, path: np.save(path, buf)
+            )
+
+    def _view_numpy(self):
+        '''Like _view_pygame.'''
+        self._layout()
+        buf = self._viewBuffer
+        if buf is None or buf.shape[1::-1] != tuple(self.dimensions):
+            buf = raster.new_framebuffer(self.dimensions)
+            self._viewBuffer = buf
+        else:
+            buf[:] = 0
+        for shape in self._visibleStatic():
+            self._numpy_draw(shape, buf)
+        self._staticBuffer = buf
+        self._staticPending = False
 
     def _resize_tkinter(self):
-        fd = self.field.Data
-        dimen = self.dimensions
         self._canvas.config(
             width=self.dimensions[0],
             height=self.dimensions[1]
             )
-        if fd["width"] / fd["height"] <= dimen[0] / dimen[1]:
-            height = dimen[1]
-            width = fd["width"] / fd["height"] * height
-        else:
-            width = dimen[0]
-            height = fd["height"] / fd["width"] * width
-        self._offset = (
-            int((dimen[0] - width) / 2),
-            int((dimen[1] - height) / 2)
-            )
-        self._staticHeight, self._staticWidth = int(height), int(width)
-        for shape in fd["static-shapes"]:
-            self._tkinter_draw(shape, "Background", offset=self._offset)
+        self._view_tkinter()
 
-    def _unitify(self, shapes, units):
-        ''' This function handles making sure units are converted properly
-This should be changed to be a generator that takes a generator so it can
-directly use the output from DynamicShape.
-'''
-        if units is None:
-            units = self.units
-        for shape in range(len(shapes)):
-            unit = ureg.parse_expression(shapes[shape].get("unit", units))
-            for point in range(len(shapes[shape]["points"])):
-                shapes[shape]["points"][point] = (
-                    shapes[shape]["points"][point][0] * unit,
-                    shapes[shape]["points"][point][1] * unit
-                )
+    def _view_tkinter(self):
+        '''Place the static shapes in view and hide the others.'''
+        self._layout()
+        visible = self._visibleStatic()
+        if self._viewBox is None:
+            for shape in visible:
+                self._tkinter_draw(shape, "Background", offset=self._offset)
+            return
+        shown = set(map(id, visible))
+        for shape in self.compiledField["static-shapes"]:
+            key = ("Background", shape.name)
+            # Items are stacked in the order they are made, so every static
+            # shape gets one the first time, even if it is out of view.
+            if id(shape) in shown or key not in self._tkItems:
+                self._tkinter_draw(shape, "Background", offset=self._offset)
+            if id(shape) not in shown:
+                self._tkinter_hide(key)
 
     def _convertCoordinateSpace(self, points, offset=(0, 0)):
-        ''' This function has three jobs.
-1. Scale coordinates to the screen size.
-2. Apply offsets to move coordinates.
-3. Convert and remove units before data is sent the graphics libraries.
+        ''' Scale unit-free points to the screen size and apply offsets.
+Returns an (n, 2) int32 array ready for the graphics libraries.
 '''
-        p = []
-        center = self.field.Data["center"]
-        dimen = (
-                 self.field.Data["width"].magnitude,
-                 self.field.Data["height"].magnitude
-                 )
-        for point in points:
-            try:
-                pv = (point[0].to(self.units), point[1].to(self.units))
-                pv = (pv[0].magnitude, pv[1].magnitude)
-            except AttributeError:
-                pv = point
-            x = (pv[0] + center[0].magnitude) / dimen[0] * self._staticWidth
-            y = (-pv[1] + center[1].magnitude) / dimen[1] * self._staticHeight
-            p.append((int(x + offset[0]), int(y + offset[1])))
-        return p
+        return geometry.transform_points(self._transform, points, offset)
 
     def _tkinter_draw(self, shape, family, offset=(0, 0)):
-        p = self._convertCoordinateSpace(shape["points"], offset)
-        p_flat = []
-        for point in p:
-            p_flat.append(point[0])
-            p_flat.append(point[1])
-        tag = self._tkinter_get_name_tag(family, shape["name"])
-        if shape["type"] == "polygon":
-            if "filled" in shape["style"]:
-                fill = "#{0:02x}{1:02x}{2:02x}".format(
-                    *shape["color"])
+        p_flat = self._convertCoordinateSpace(
+            shape.points,
+            offset
+            ).ravel().tolist()
+        self._tkinter_place(shape, family, p_flat)
+
+    def _tkinter_place(self, shape, family, p_flat):
+        '''Create or update the canvas item for a shape.
+Items are kept in self._tkItems by (family, name), so steady-state frames
+never search the canvas, and coords/colors are only sent to Tcl when they
+actually change.'''
+        if shape.kind == POLYGON:
+            if shape.style & FILLED and self.filledPolygons:
+                fill = shape.hex
             else:
                 fill = ""
-            if "outline" in shape["style"]:
-                outline = "#{0:02x}{1:02x}{2:02x}".format(
-                    *shape["color"])
+            wireframe = shape.style & FILLED and not self.filledPolygons
+            if shape.style & OUTLINE or wireframe:
+                outline = shape.hex
             else:
                 outline = ""
-            if len(self._canvas.find_withtag(tag + "-l")) <= 0:
-                self._canvas.create_polygon(
-                    0, 0, 0, 0,
+        elif shape.kind == LINE:
+            fill = shape.hex
+            outline = None
+        else:
+            return
+        key = (family, shape.name)
+        item = self._tkItems.get(key, None)
+        if item is None:
+            tag = self._tkinter_get_name_tag(family, shape.name)
+            tags = (
+                tag + "-l",
+                tag,
+                "RoboRadar-" + family,
+                "RoboRadar"
+                )
+            if outline is None:
+                i = self._canvas.create_line(
+                    *p_flat,
+                    fill=fill,
+                    tags=tags
+                    )
+            else:
+                i = self._canvas.create_polygon(
+                    *p_flat,
                     fill=fill,
                     outline=outline,
-                    tags=(
-                        tag + "-l",
-                        tag,
-                        "RoboRadar-" + family,
-                        "RoboRadar"
-                        )
+                    tags=tags
                     )
-            self._canvas.coords(tag, *p_flat)
-        elif shape["type"] == "line":
-            if len(self._canvas.find_withtag(tag + "-l")) <= 0:
-                self._canvas.create_line(
-                    0, 0, 0, 0,
-                    fill="#{0:02x}{1:02x}{2:02x}".format(
-                        *shape["color"]),
-                    tags=(
-                        tag + "-l",
-                        tag,
-                        "RoboRadar-" + family,
-                        "RoboRadar"
-                        )
+            self._tkItems[key] = [i, p_flat, fill, outline, False]
+            return
+        if item[4]:
+            self._canvas.itemconfigure(item[0], state="normal")
+            item[4] = False
+        if item[1] != p_flat:
+            self._canvas.coords(item[0], *p_flat)
+            item[1] = p_flat
+        if item[2] != fill or item[3] != outline:
+            if outline is None:
+                self._canvas.itemconfigure(item[0], fill=fill)
+            else:
+                self._canvas.itemconfigure(
+                    item[0],
+                    fill=fill,
+                    outline=outline
                     )
-            self._canvas.coords(tag, *p_flat)
+            item[2] = fill
+            item[3] = outline
+
+    def _tkinter_hide(self, key):
+        '''Hide the canvas item of a shape that is out of view. Placing it
+again shows it.'''
+        item = self._tkItems.get(key, None)
+        if item is not None and not item[4]:
+            self._canvas.itemconfigure(item[0], state="hidden")
+            item[4] = True
 
     def _pygame_draw(self, shape, surface, offset=(0, 0)):
-        p = self._convertCoordinateSpace(shape["points"], offset)
-        if shape["type"] == "polygon":
-            if "filled" in shape["style"]:
+        p = self._convertCoordinateSpace(shape.points, offset).tolist()
+        self._pygame_raster(shape, p, surface)
+
+    def _pygame_raster(self, shape, p, surface):
+        if shape.kind == POLYGON:
+            if shape.style & FILLED and self.filledPolygons:
                 pygame.gfxdraw.filled_polygon(
                     surface,
                     p,
-                    shape["color"]
+                    shape.color
                     )
-            if "outline" in shape["style"]:
+            wireframe = shape.style & FILLED and not self.filledPolygons
+            if shape.style & OUTLINE or wireframe:
                 pygame.gfxdraw.polygon(
                     surface,
                     p,
-                    shape["color"]
+                    shape.color
                     )
-            if "aa" in shape["style"]:
+            if shape.style & AA and self.antialiasing:
                 pygame.gfxdraw.aapolygon(
                     surface,
                     p,
-                    shape["color"]
+                    shape.color
                     )
-        elif shape["type"] == "line":
-            if "outline" in shape["style"]:
+        elif shape.kind == LINE:
+            if shape.style & OUTLINE:
                 pygame.gfxdraw.line(
                     surface,
                     p[0][0],
                     p[0][1],
                     p[1][0],
                     p[1][1],
-                    shape["color"]
+                    shape.color
                     )
-            if "aa" in shape["style"]:
+            if shape.style & AA and self.antialiasing:
                 pygame.gfxdraw.aapolygon(
                     surface,
                     p,
-                    shape["color"]
+                    shape.color
+                    )
+
+    def _toggleOverlay_pygame(self):
+        # Whatever the overlay covered has to be drawn again.
+        self._fullRedraw = True
+
+    def _pygame_overlay(self, surface):
+        lines = self._overlayLines()
+        if lines is not None:
+            if self._overlayFont is None:
+                if not pygame.font.get_init():
+                    pygame.font.init()
+                self._overlayFont = pygame.font.SysFont(
+                    "couriernew,dejavusansmono,monospace",
+                    13
+                    )
+            text = [
+                self._overlayFont.render(line, True, (255, 255, 255))
+                for line in lines
+                ]
+            overlay = pygame.Surface((
+                max(t.get_width() for t in text) + 8,
+                sum(t.get_height() for t in text) + 8
+                ))
+            overlay.fill((32, 32, 32))
+            y = 4
+            for t in text:
+                overlay.blit(t, (4, y))
+                y += t.get_height()
+            if self._overlay is not None \
+                    and self._overlay.get_size() != overlay.get_size():
+                self._fullRedraw = True
+            self._overlay = overlay
+        self.dirty.append(surface.blit(self._overlay, (4, 4)))
+
+    def _toggleOverlay_tkinter(self):
+        if self._overlay is not None:
+            self._canvas.delete(self._overlay)
+            self._overlay = None
+
+    def _tkinter_overlay(self):
+        lines = self._overlayLines()
+        if lines is None:
+            return
+        if self._overlay is None:
+            self._overlay = self._canvas.create_text(
+                4,
+                4,
+                anchor="nw",
+                text="\n".join(lines),
+                fill="#ffffff",
+                font=("Courier", 9),
+                tags=("RoboRadar-Overlay",)
+                )
+        else:
+            self._canvas.itemconfigure(self._overlay, text="\n".join(lines))
+        self._canvas.tag_raise(self._overlay)
+
+    def _numpy_draw(self, shape, buf, offset=(0, 0)):
+        p = self._convertCoordinateSpace(shape.points, offset)
+        self._numpy_raster(shape, p, buf)
+
+    def _numpy_raster(self, shape, p, buf):
+        # There is no antialiasing here, "aa" just gets a hard outline.
+        if shape.kind == POLYGON:
+            if shape.style & FILLED and self.filledPolygons:
+                raster.fill_polygon(buf, p, shape.color)
+            if shape.style & OUTLINE \
+                    or shape.style & AA and self.antialiasing \
+                    or shape.style & FILLED and not self.filledPolygons:
+                raster.draw_polyline(buf, p, shape.color, closed=True)
+        elif shape.kind == LINE:
+            if shape.style & OUTLINE or shape.style & AA and self.antialiasing:
+                raster.draw_polyline(buf, p, shape.color)
+
+    def _viewDynamic(self):
+        '''Put the scene's current world geometry through this Radar's
+screen transform. Returns a list of (ds, shape, points) with float screen
+coordinates. With a camera view, shapes that are out of it are left out
+before their points are transformed.'''
+        world = self.scene
+        entries = world.entries
+        vertices = world.vertices
+        offsets = world.offsets
+        self.culledShapes = 0
+        if self._viewBox is not None and entries:
+            keep = spatial.visible(world.getBounds(), self._viewBox)
+            if not keep.all():
+                counts = np.diff(offsets)
+                vertices = vertices[np.repeat(keep, counts)]
+                offsets = np.zeros(int(keep.sum()) + 1, dtype=np.intp)
+                np.cumsum(counts[keep], out=offsets[1:])
+                entries = [e for e, k in zip(entries, keep.tolist()) if k]
+                self.culledShapes = len(world.entries) - len(entries)
+        vertices = geometry.transform_points(
+            self._transform,
+            vertices,
+            self._offset,
+            np.float64
+            )
+        offsets = offsets.tolist()
+        frame = [
+            (ds, shape, vertices[offsets[i]:offsets[i + 1]])
+            for i, (ds, shape) in enumerate(entries)
+            ]
+        self._sceneVersion = world.version
+        self._mark("transform")
+        return frame
+
+    def _computeDynamic(self):
+        '''Update the scene if this Radar owns it, and return this frame's
+(ds, shape, points) list, with points as float screen coordinates.'''
+        if self._ownsScene:
+            self.scene.update(self._mark)
+        self._updateView()
+        return self._viewDynamic()
+
+    def _screenDynamic(self):
+        '''Yields (ds, shape, points) for every dynamic shape this frame,
+with points as int32 screen coordinates. Geometry already computed by
+needsRender is used instead of computing it again.'''
+        frame = self._pendingFrame
+        if frame is None:
+            # Settling the static layer is drawing too.
+            self._mark("raster")
+            frame = self._computeDynamic()
+        self._pendingFrame = None
+        self._lastFrame = frame
+        self._invalid = False
+        if self.trailSeconds:
+            self._sampleTrails(frame)
+        for ds, shape, p in frame:
+            yield ds, shape, p.astype(np.int32)
+
+    def _sampleTrails(self, frame):
+        '''Add the latched position of every DynamicShape to its trail.
+A trail takes the color of the shape's first shape, usually the bumpers.'''
+        now = time.monotonic()
+        colors = {}
+        for ds, shape, p in frame:
+            colors.setdefault(ds, shape.color)
+        self._trailColors = colors
+        for ds in self.scene.dsArray:
+            t = self._trails.get(ds, None)
+            if t is None:
+                # The buffer holds trailSeconds at FPS, sampling faster than
+                # that just makes the trail shorter.
+                t = trail.Trail(
+                    self.trailSeconds,
+                    int(self.trailSeconds * conf["VIDEO"]["FPS"]) + 2
+                    )
+                self._trails[ds] = t
+            unit = ds.units
+            if unit is None:
+                unit = self.units
+            scale = units.scale(unit)
+            t.push(now, ds.x * scale, ds.y * scale)
+
+    def _trailScreen(self, points):
+        '''Field points of a trail to decimated int32 screen points.'''
+        return trail.decimate(geometry.transform_points(
+            self._transform,
+            points,
+            self._offset,
+            np.float64
+            ))
+
+    def _trailColor(self, ds):
+        return self._trailColors.get(ds, (255, 255, 255))
+
+    def _pygame_trails(self, dirty):
+        '''Bring the trail layer up to date. Each frame only the newest
+segment of every trail is drawn onto it. Every TRAIL_REBUILD seconds it is
+redrawn from the ring buffers instead, which is what drops the ends that
+are older than trailSeconds. Changed areas are added to dirty.'''
+        now = time.monotonic()
+        layer = self._trailLayer
+        if layer is None or now - self._trailBuilt >= self.TRAIL_REBUILD:
+            if layer is None:
+                layer = pygame.Surface(self.dimensions)
+                layer.set_colorkey((0, 0, 0))
+                self._trailLayer = layer
+            else:
+                dirty.append(self._trailRect)
+            layer.fill((0, 0, 0))
+            self._trailBuilt = now
+            self._trailEnds = {}
+            rects = []
+            for ds, t in self._trails.items():
+                p = self._trailScreen(t.points(now))
+                if len(p):
+                    self._trailEnds[ds] = p[-1]
+                if len(p) >= 2:
+                    rects.append(pygame.draw.lines(
+                        layer,
+                        self._trailColor(ds),
+                        False,
+                        p.tolist(),
+                        2
+                        ))
+            if rects:
+                self._trailRect = rects[0].unionall(rects[1:])
+            else:
+                self._trailRect = pygame.Rect(0, 0, 0, 0)
+            dirty.append(self._trailRect)
+            return
+        for ds, t in self._trails.items():
+            last = t.last()
+            if last is None:
+                continue
+            end = self._trailEnds.get(ds, None)
+            new = self._trailScreen(last[None])[0]
+            self._trailEnds[ds] = new
+            if end is None or (end == new).all():
+                continue
+            rect = pygame.draw.line(
+                layer,
+                self._trailColor(ds),
+                end.tolist(),
+                new.tolist(),
+                2
+                )
+            if self._trailRect.width:
+                self._trailRect.union_ip(rect)
+            else:
+                self._trailRect = rect
+            dirty.append(rect)
+
+    def _expireTrails(self):
+        '''Drop trail points older than trailSeconds, at most every
+TRAIL_REBUILD seconds. Returns True if any were dropped, the trails on
+screen are then longer than they should be.'''
+        now = time.monotonic()
+        if now - self._trailsExpired < self.TRAIL_REBUILD:
+            return False
+        self._trailsExpired = now
+        expired = False
+        for t in self._trails.values():
+            expired = t.expire(now) or expired
+        if expired:
+            # The pygame trail layer only loses points when it is rebuilt.
+            self._trailBuilt = -math.inf
+        return expired
+
+    def _numpy_trails(self, buf):
+        now = time.monotonic()
+        for ds, t in self._trails.items():
+            p = self._trailScreen(t.points(now))
+            if len(p) >= 2:
+                raster.draw_polyline(buf, p, self._trailColor(ds))
+
+    def _tkinter_trails(self):
+        now = time.monotonic()
+        for ds, t in self._trails.items():
+            p = self._trailScreen(t.points(now))
+            item = self._tkTrails.get(ds, None)
+            if len(p) < 2:
+                if item is not None:
+                    self._canvas.itemconfigure(item, state="hidden")
+                continue
+            p_flat = p.ravel().tolist()
+            color = geometry.color_hex(self._trailColor(ds))
+            if item is None:
+                item = self._canvas.create_line(
+                    *p_flat,
+                    fill=color,
+                    width=2,
+                    tags=("RoboRadar-Trails", "RoboRadar")
                     )
+                # Above the field, below the robots.
+                self._canvas.tag_raise(item, "RoboRadar-Background")
+                self._tkTrails[ds] = item
+            else:
+                self._canvas.coords(item, *p_flat)
+                self._canvas.itemconfigure(item, fill=color, state="normal")
+
+    def _sameFrame(self, a, b):
+        if b is None or len(a) != len(b):
+            return False
+        for (ds, shape, p), (ds2, shape2, p2) in zip(a, b):
+            if ds is not ds2 or not geometry.same_style(shape, shape2):
+                return False
+            if p.shape != p2.shape:
+                return False
+            if len(p) and np.abs(p - p2).max() >= self.moveThreshold:
+                return False
+        return True
+
+    def invalidate(self):
+        '''Make the next needsRender return True and the next render redraw
+everything, dirty rects or not. Call this after changing anything that
+affects how the frame looks, or when the window needs repainting.'''
+        self._invalid = True
+        self._fullRedraw = True
+
+    def needsRender(self):
+        '''Used for on-change rendering. Returns True when the next frame
+would look different from the last rendered one: the field or window size
+changed, invalidate was called, a shape moved at least moveThreshold
+pixels, or trails have points older than trailSeconds to drop. The geometry
+computed here is reused by the next render.'''
+        if self.compiledField is None:
+            return False
+        self._beginStats()
+        self._settleStatic()
+        if self._ownsScene:
+            self.scene.update(self._mark)
+        self._updateView()
+        if self.trailSeconds and self._expireTrails():
+            self._invalid = True
+        if not self._invalid and self.scene.version == self._sceneVersion:
+            self._cancelStats()
+            return False
+        frame = self._viewDynamic()
+        if self._invalid or not self._sameFrame(frame, self._lastFrame):
+            self._pendingFrame = frame
+            return True
+        self._cancelStats()
+        return False
+
+    def _pygame_bounds(self, vertices, rect=None):
+        '''Screen rect covering vertices, with room for antialiasing, and
+rect if given.'''
+        lo = vertices.min(axis=0)
+        hi = vertices.max(axis=0)
+        bounds = pygame.Rect(
+            int(lo[0]) - 2,
+            int(lo[1]) - 2,
+            int(hi[0] - lo[0]) + 5,
+            int(hi[1] - lo[1]) + 5
+            )
+        if rect is not None:
+            bounds.union_ip(rect)
+        return bounds
+
+    def _pygame_sprite(self, ds):
+        '''Return (sprite, rect) for the cached sprite of ds and where it
+goes on screen, or None if ds has to be drawn shape by shape. Only
+DynamicShapes with a template get sprites.'''
+        if self.spriteCache is None:
+            return None
+        entry = self.scene.templatePoses.get(ds, None)
+        if entry is None:
+            return None
+        template, pose = entry
+        sprite, corner = self.spriteCache.get(
+            template,
+            pose,
+            self._transform,
+            self.filledPolygons,
+            self.antialiasing
+            )
+        (a, b, c), (d, e, f), _ = self._transform.tolist()
+        (_, _, x), (_, _, y), _ = pose.tolist()
+        return sprite, sprite.get_rect(topleft=(
+            corner[0] + round(a * x + b * y + c + self._offset[0]),
+            corner[1] + round(d * x + e * y + f + self._offset[1])
+            ))
+
+    def _pygame_robot(self, shapes, sprite, surface):
+        '''Draw the (shape, points) of one DynamicShape, as one blit if it
+has a sprite (see _pygame_sprite). Returns the sprite's rect or None.'''
+        if sprite is None:
+            for shape, p in shapes:
+                self._pygame_raster(shape, p.tolist(), surface)
+            return None
+        surface.blit(
+            sprite[0],
+            sprite[1],
+            special_flags=pygame.BLEND_PREMULTIPLIED
+            )
+        return sprite[1]
 
     def pygame_render(self):
+        '''Render a frame and return the visible surface.
+Afterwards self.dirty lists the rects that changed. Without dirtyRects, or
+after a resize, that is the whole surface.'''
+        self._beginStats()
+        self._settleStatic()
+        # The frame comes first, a following camera may move the view.
+        shapes = list(self._screenDynamic())
+        if self.dirtyRects and not self._fullRedraw:
+            return self._pygame_render_dirty(shapes)
+        self._fullRedraw = False
         self._visibleSurface.fill((0, 0, 0))
         self._visibleSurface.blit(self._staticSurface, self._offset)
-        for ds in self._dsArray:
-            shapes = list(ds.draw(self.field.Data["orientation"]))
-            self._unitify(shapes, ds.units)
-            for shape in shapes:
-                self._pygame_draw(shape, self._visibleSurface, self._offset)
+        if self.trailSeconds:
+            self._pygame_trails([])
+            self._visibleSurface.blit(
+                self._trailLayer,
+                self._trailRect,
+                self._trailRect
+                )
+        frame = {}
+        for ds, shape, p in shapes:
+            frame.setdefault(ds, []).append((shape, p))
+        rects = {}
+        for ds, dsShapes in frame.items():
+            rects[ds] = self._pygame_robot(
+                dsShapes,
+                self._pygame_sprite(ds),
+                self._visibleSurface
+                )
+        if self.dirtyRects:
+            self._robotVertices = {
+                ds: np.concatenate([p for shape, p in dsShapes])
+                for ds, dsShapes in frame.items()
+                }
+            self._robotRects = {
+                ds: self._pygame_bounds(v, rects[ds])
+                for ds, v in self._robotVertices.items()
+                }
+        self.dirty = [self._visibleSurface.get_rect()]
+        if self.showOverlay:
+            self._pygame_overlay(self._visibleSurface)
+        self._renderedStats()
         return self._visibleSurface
 
+    def _pygame_render_dirty(self, shapes):
+        '''Only restore and redraw the screen around robots that moved.'''
+        surface = self._visibleSurface
+        frame = {}
+        for ds, shape, p in shapes:
+            frame.setdefault(ds, []).append((shape, p))
+        vertices = {}
+        rects = {}
+        robotSprites = {}
+        dirty = []
+        moved = set()
+        for ds, shapes in frame.items():
+            v = np.concatenate([p for shape, p in shapes])
+            vertices[ds] = v
+            robotSprites[ds] = self._pygame_sprite(ds)
+            if robotSprites[ds] is None:
+                rects[ds] = self._pygame_bounds(v)
+            else:
+                rects[ds] = self._pygame_bounds(v, robotSprites[ds][1])
+            prev = self._robotVertices.get(ds, None)
+            if prev is None or not np.array_equal(prev, v):
+                moved.add(ds)
+                dirty.append(rects[ds])
+                if ds in self._robotRects:
+                    dirty.append(self._robotRects[ds])
+        for ds, rect in self._robotRects.items():
+            if ds not in frame:
+                dirty.append(rect)
+        if self.trailSeconds:
+            self._pygame_trails(dirty)
+        # A robot that overlaps a restored area has to be redrawn, and since
+        # antialiased edges blend with what is underneath, its whole rect has
+        # to be restored first. Keep growing the set until it settles.
+        redraw = set(moved)
+        grown = True
+        while grown:
+            grown = False
+            for ds in frame:
+                if ds not in redraw and rects[ds].collidelist(dirty) != -1:
+                    redraw.add(ds)
+                    dirty.append(rects[ds])
+                    grown = True
+        staticRect = self._staticSurface.get_rect(topleft=self._offset)
+        # A camera can put robots partly outside the window, and fill
+        # doesn't clip rects that start above or left of the surface.
+        bounds = surface.get_rect()
+        dirty = [rect.clip(bounds) for rect in dirty]
+        for rect in dirty:
+            surface.fill((0, 0, 0), rect)
+            area = rect.clip(staticRect)
+            surface.blit(
+                self._staticSurface,
+                area,
+                area.move(-self._offset[0], -self._offset[1])
+                )
+            if self.trailSeconds:
+                surface.blit(self._trailLayer, rect, rect)
+        for ds, shapes in frame.items():
+            if ds in redraw:
+                self._pygame_robot(shapes, robotSprites[ds], surface)
+        self._robotVertices = vertices
+        self._robotRects = rects
+        self.dirty = dirty
+        if self.showOverlay:
+            self._pygame_overlay(surface)
+        self._renderedStats()
+        return surface
+
     def tkinter_render(self):
-        for ds in self._dsArray:
-            shapes = list(ds.draw(self.field.Data["orientation"]))
-            self._unitify(shapes, ds.units)
-            print(shapes)
-            for shape in shapes:
-                self._tkinter_draw(
-                    shape,
-                    "DS{}".format(
-                        ds.number
-                        ),
-                    self._offset
-                    )
+        self._beginStats()
+        self._settleStatic()
+        shapes = list(self._screenDynamic())
+        if self.trailSeconds:
+            self._tkinter_trails()
+        shown = set()
+        for ds, shape, p in shapes:
+            family = "DS{}".format(ds.number)
+            self._tkinter_place(shape, family, p.ravel().tolist())
+            shown.add((family, shape.name))
+        # Shapes the camera culled keep their items, out of sight.
+        for key in self._tkShown - shown:
+            self._tkinter_hide(key)
+        self._tkShown = shown
+        if self.showOverlay:
+            self._tkinter_overlay()
+        self._renderedStats()
+
+    def numpy_render(self):
+        '''Render into the framebuffer and return it. This is not a copy, the
+same (height, width, 3) uint8 array is reused by the next call.'''
+        self._beginStats()
+        self._settleStatic()
+        shapes = list(self._screenDynamic())
+        buf = self._framebuffer
+        buf[:] = 0
+        ox, oy = self._offset
+        buf[
+            oy:oy + self._staticHeight,
+            ox:ox + self._staticWidth
+            ] = self._staticBuffer
+        if self.trailSeconds:
+            self._numpy_trails(buf)
+        for ds, shape, p in shapes:
+            self._numpy_raster(shape, p, buf)
+        self._renderedStats()
+        return buf
 
     def tkinter_get_canvas(self):
         return self._canvas
@@ -7,8 +7,10 @@ except ImportError:
     import __init__ as roboradar
 try:
     from roboradar import config
+    from roboradar import server
 except ImportError:
     import config
+    import server
 import argparse
 
 
@@ -25,9 +27,34 @@ def start():
     parser = argparse.ArgumentParser()
     parser.add_argument('-l', '--local', action='store_true')
     parser.add_argument('-c', '--conf', type=file_path)
+    parser.add_argument(
+        '--profile-startup',
+        action='store_true',
+        help="time each startup phase, then exit after the first frame"
+        )
+    parser.add_argument(
+        '--profile-output',
+        help="write the --profile-startup report to this JSON file"
+        )
+    parser.add_argument(
+        '--serve',
+        action='store_true',
+        help="render without a window and stream the frames over HTTP"
+        )
+    parser.add_argument(
+        '--host',
+        help="address for --serve to listen on, SERVER.HOST by default"
+        )
+    parser.add_argument(
+        '--port',
+        type=int,
+        help="port for --serve to listen on, SERVER.PORT by default"
+        )
     options = parser.parse_args()
+    roboradar.startup.profiling = options.profile_startup
     if options.conf is not None:
-        config.load_config(options.conf)
+        with roboradar.startup.phase("config"):
+            config.load_config(options.conf)
     conf = config.get_config()
     if options.local:
         conf["ROBOT"]["IP_ADDRESS"] = "127.0.0.1"
@@ -54,7 +81,12 @@ def start():
             exit(1)
         config.set_nt_address(conf["TEAM"]["NUMBER"])
     conf = config.get_config()
-    roboradar.start_independent()
+    if options.serve:
+        server.serve(options.host, options.port)
+    else:
+        roboradar.start_independent()
+    if options.profile_startup:
+        roboradar.startup.dump(options.profile_output)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,71 @@
+'''Copying robot state off the render thread.
+
+Robot sources are updated by their own threads (NetworkTables listeners and
+such) under their own locks. Instead of the render loop taking those locks,
+an Acquisition thread copies every source's state into a back buffer a few
+hundred times a second and then swaps it in as the front buffer. The render
+loop only ever reads front, which is never modified after the swap, so it
+never waits on a lock or the network, and swapping is one assignment however
+many robots there are.'''
+
+import threading
+
+try:
+    from roboradar import config
+except ImportError:
+    import config
+
+
+class Acquisition(threading.Thread):
+    '''front is a tuple with the latest source.acquire() of every
+registered source, by the slot register returned.'''
+
+    def __init__(self, rate=200):
+        super().__init__(name="RoboRadar acquisition", daemon=True)
+        self.interval = 1 / rate
+        self.front = ()
+        self._sources = ()
+        # Only taken by this thread and register, never by readers.
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def register(self, source):
+        '''Add source, which needs an acquire method that is safe to call
+from this thread. Returns its slot in front. The thread is started by the
+first registration.'''
+        with self._lock:
+            self._sources += (source,)
+            self.front += (source.acquire(),)
+            if not self.is_alive():
+                self.start()
+            return len(self._sources) - 1
+
+    def acquire(self):
+        '''Fill a back buffer and swap it in.'''
+        with self._lock:
+            back = tuple(source.acquire() for source in self._sources)
+            # A new tuple every time instead of reusing the old front, a
+            # frame that is still reading it mustn't see it change.
+            self.front = back
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            self.acquire()
+
+    def stop(self):
+        self._stopped.set()
+
+
+_acquisition = None
+
+
+def default_acquisition():
+    '''The shared Acquisition thread, or None if ROBOT.ACQUISITION_HZ is 0
+and robots are read directly by the render loop.'''
+    global _acquisition
+    rate = config.get_config()["ROBOT"].get("ACQUISITION_HZ", 200)
+    if not rate:
+        return None
+    if _acquisition is None:
+        _acquisition = Acquisition(rate)
+    return _acquisition
@@ -0,0 +1,82 @@
+'''Caches for rendered static field layers.
+
+Layers are kept in memory in an LRU keyed by (engine, field file, field
+version, pixel size, antialiasing, filled polygons), and optionally written
+to VIDEO.STATIC_CACHE_DIR so the first frame after launch doesn't have to
+wait for rasterization.'''
+
+import collections
+import os
+
+try:
+    from roboradar import config
+except ImportError:
+    import config
+
+
+class LRUCache:
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._items = collections.OrderedDict()
+
+    def get(self, key, default=None):
+        if key not in self._items:
+            return default
+        self._items.move_to_end(key)
+        return self._items[key]
+
+    def put(self, key, value):
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def clear(self):
+        self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+
+staticLayers = LRUCache(
+    config.get_config()["VIDEO"].get("STATIC_CACHE_SIZE", 8)
+    )
+
+
+def disk_path(key, version, ext):
+    '''Return where a static layer is stored on disk, or None if the disk
+cache is disabled. version is the RoboRadar version, so layers from older
+releases are never reused.'''
+    directory = config.get_config()["VIDEO"].get("STATIC_CACHE_DIR", None)
+    if not directory:
+        return None
+    name = "-".join(str(part) for part in (version,) + tuple(key))
+    name = "".join(c if c.isalnum() or c in "-_." else "_" for c in name)
+    return os.path.join(os.path.expanduser(directory), name + ext)
+
+
+def load(path, loader):
+    '''Load a cached layer with loader, returning None if it is missing or
+unreadable.'''
+    if path is None or not os.path.exists(path):
+        return None
+    try:
+        return loader(path)
+    except Exception:
+        return None
+
+
+def save(path, layer, saver):
+    '''Store a layer with saver. The disk cache is only an optimization, so
+failures are ignored.'''
+    if path is None:
+        return
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        saver(layer, path)
+    except Exception:
+        pass
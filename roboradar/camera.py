@@ -0,0 +1,112 @@
+'''Where a Radar looks.
+
+By default a Radar fits the whole field into its window. A Camera can pan,
+zoom and rotate that view, or keep a robot in the middle of it. Camera
+coordinates are field meters, like scene.Scene geometry, so a view doesn't
+drift when the window is resized.'''
+
+import math
+
+import numpy as np
+
+MIN_ZOOM = 0.25
+MAX_ZOOM = 64
+
+
+class Camera:
+    '''center is the field point in the middle of the view, None for the
+middle of the field. zoom 1 fits the whole field, 2 shows half as much.
+rotation turns the view counterclockwise, in radians. While follow is a
+DynamicShape, it is kept in the middle instead, and with followHeading its
+front also points up.'''
+
+    def __init__(self):
+        self.home = (0.0, 0.0)
+        self._shown = None
+        self.reset()
+
+    def reset(self):
+        '''Back to the whole field.'''
+        self.center = None
+        self.zoom = 1.0
+        self.rotation = 0.0
+        self.follow = None
+        self.followHeading = False
+
+    def isDefault(self):
+        return self.center is None and self.zoom == 1 \
+            and self.rotation == 0 and self.follow is None
+
+    def getCenter(self):
+        if self.center is None:
+            return self.home
+        return self.center
+
+    def release(self):
+        '''Stop following, leaving the view where it is.'''
+        if self.follow is not None and self._shown is not None:
+            x, y, self.rotation = self._shown
+            self.center = (x, y)
+        self.follow = None
+        self.followHeading = False
+
+    def pan(self, dx, dy):
+        '''Move the view by dx, dy field meters. Stops following.'''
+        self.release()
+        x, y = self.getCenter()
+        self.center = (x + dx, y + dy)
+
+    def zoomBy(self, factor, anchor=None):
+        '''Zoom in by factor, out if it is below 1. anchor is a field point
+that stays where it is on screen, the middle of the view if None.'''
+        zoom = min(max(self.zoom * factor, MIN_ZOOM), MAX_ZOOM)
+        if anchor is not None and self.follow is None:
+            x, y = self.getCenter()
+            f = self.zoom / zoom
+            self.center = (
+                anchor[0] + (x - anchor[0]) * f,
+                anchor[1] + (y - anchor[1]) * f
+                )
+        self.zoom = zoom
+
+    def rotateBy(self, angle):
+        self.rotation = (self.rotation + angle) % (2 * math.pi)
+        if self.rotation == 0:
+            self.rotation = 0.0
+
+    def followDs(self, ds, heading=False):
+        '''Keep ds in the middle of the view, None to stop. With heading,
+also turn the view so ds faces up.'''
+        self.follow = ds
+        self.followHeading = heading and ds is not None
+        if ds is None:
+            self.center = None
+
+    def getMatrix(self, fit, scene):
+        '''The 3x3 matrix taking field meters to window pixels. fit is the
+one that fits the whole field in the window, and zoom 1 looks the same
+around home.'''
+        (a, b, c), (d, e, f), _ = fit.tolist()
+        hx, hy = self.home
+        screen = (a * hx + b * hy + c, d * hx + e * hy + f)
+        x, y = self.getCenter()
+        rotation = self.rotation
+        if self.follow is not None and self.follow in scene.dsArray:
+            pose = scene.getPose(self.follow)
+            x, y = pose[0, 2], pose[1, 2]
+            if self.followHeading:
+                # The local y axis is the front of a DynamicShape.
+                rotation = math.pi / 2 - math.atan2(pose[1, 1], pose[0, 1])
+        self._shown = (x, y, rotation)
+        cos = math.cos(rotation)
+        sin = math.sin(rotation)
+        # Screen y points down, so this turns counterclockwise on screen.
+        linear = np.array(((cos, sin), (-sin, cos))) @ fit[:2, :2] \
+            * self.zoom
+        matrix = np.identity(3)
+        matrix[:2, :2] = linear
+        matrix[:2, 2] = (
+            screen[0] - linear[0, 0] * x - linear[0, 1] * y,
+            screen[1] - linear[1, 0] * x - linear[1, 1] * y
+            )
+        return matrix
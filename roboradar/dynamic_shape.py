@@ -1,5 +1,13 @@
 from abc import ABC, abstractmethod
 import math
+import numpy as np
+
+try:
+    from roboradar import geometry
+    from roboradar import shape_record
+except ImportError:
+    import geometry
+    import shape_record
 
 
 class DynamicShape(ABC):
@@ -13,14 +21,41 @@ class DynamicShape(ABC):
     number = None
     units = None
 
+    def beginFrame(self):
+        '''This method is called once per frame, before draw.
+Sources that update asynchronously should latch their state here so that
+everything read during the frame is consistent.'''
+        pass
+
+    def getStamp(self):
+        '''Return a value that compares equal between frames only if nothing
+about this shape changed. None means unknown, so the geometry has to be
+checked every frame.'''
+        return None
+
+    def getTemplateKey(self):
+        '''Return a hashable key for this shape's local geometry, or None if
+it doesn't use templates. Everything getShapes depends on, apart from the
+pose, has to be part of the key, because shapes with equal keys share one
+Template and getShapes is only called when the key is new.'''
+        return None
+
+    def getTemplate(self):
+        '''Return the shared geometry.Template for this shape, or None.'''
+        key = self.getTemplateKey()
+        if key is None:
+            return None
+        return geometry.get_template(key, self.drawLocal)
+
     @abstractmethod
     def getShapes(self):
         '''This method is called once per frame.
-it should return a list of shapes to be drawn on the screen.'''
+it should return a list of shapes to be drawn on the screen, as PSF1 shape
+dicts or shape_record.Shapes.'''
         pass
 
-    def draw(self, r_adjust=0):
-        shapes = self.getShapes()
+    def _rotation(self, r_adjust=0):
+        '''Return (rsin, rcos) for the current heading plus r_adjust.'''
         if self.d is None:
             r = self.r
         else:
@@ -45,13 +80,32 @@ it should return a list of shapes to be drawn on the screen.'''
             r = r + r_adjust
             rsin = math.sin(r)
             rcos = math.cos(r)
-        for shape in shapes:
-            if shape["type"] == "polygon" or shape["type"] == "line":
-                if shape["coordinate-space"] == "local":
-                    points = []
-                    for point in shape["points"]:
-                        x = point[0] * rcos - point[1] * rsin + self.x
-                        y = point[0] * rsin + point[1] * rcos + self.y
-                        points.append((x, y))
-                    shape["points"] = points
-                    yield shape
+        return rsin, rcos
+
+    def getMatrix(self, r_adjust=0, scale=1):
+        '''Return the 3x3 affine matrix taking local-space points to field
+space. scale converts the result out of self.units.'''
+        rsin, rcos = self._rotation(r_adjust)
+        return np.array((
+            (rcos * scale, -rsin * scale, self.x * scale),
+            (rsin * scale, rcos * scale, self.y * scale),
+            (0.0, 0.0, 1.0)
+            ))
+
+    def drawLocal(self):
+        '''Like draw, but the points are left in local space so they can be
+transformed in bulk with getMatrix.'''
+        for shape in self.getShapes():
+            shape = shape_record.to_shape(shape)
+            if shape.kind and shape.local:
+                yield shape
+
+    def draw(self, r_adjust=0):
+        '''Yield a Shape for each shape, with its points moved to where
+this DynamicShape is, still in its units.'''
+        rsin, rcos = self._rotation(r_adjust)
+        rotation = np.array(((rcos, rsin), (-rsin, rcos)))
+        for shape in self.drawLocal():
+            points = shape.points @ rotation
+            points += (self.x, self.y)
+            yield shape.withPoints(points)
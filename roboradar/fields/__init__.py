@@ -1,16 +1,69 @@
-import importlib, os
-fields = []
+import os
+
+try:
+    from roboradar import plugins
+    from roboradar import startup
+except ImportError:
+    import plugins
+    import startup
+
+
+class FieldList:
+    '''Field modules by index. A module is only imported the first time it
+is looked up.'''
+
+    def __init__(self, names):
+        self._names = names
+        self._modules = {}
+
+    def __len__(self):
+        return len(self._names)
+
+    def __getitem__(self, index):
+        module = self._modules.get(index, None)
+        if module is None:
+            module = plugins.load(self._names[index], __package__)
+            self._modules[index] = module
+        return module
+
+    def name(self, index):
+        '''Module name of the field at index, without importing it.'''
+        return self._names[index]
+
+
+fieldManifests = []
 fieldFiles = {}
 fieldNames = {}
 fieldThemes = {}
-for file in os.listdir(__file__[:-11]):
-    if file.endswith(".py") and file != "__init__.py":
-        if __package__:
-            module = "." + file[:-3]
-        else:
-            module = file[:-3]
-        fieldIndex = len(fields)
-        fields.append(importlib.import_module(module, package=__package__))
-        fieldFiles[fields[-1].Data["file"]] = fieldIndex #TODO: add version overriding
-        fieldNames[fields[-1].Data["name"]] = fieldIndex
-        fieldThemes[fields[-1].Data["theme"]] = fieldIndex
+fieldAliases = {}
+with startup.phase("field discovery"):
+    manifests = plugins.scan(
+        os.path.dirname(os.path.realpath(__file__)),
+        plugins.data_manifest
+        )
+for module, manifest in manifests.items():
+    fieldIndex = len(fieldManifests)
+    if manifest is None or not {"file", "name", "theme"} <= set(manifest):
+        # Can't be read statically, so it has to be imported after all.
+        manifest = dict(plugins.load(module, __package__).Data)
+    fieldManifests.append((module, manifest))
+    fieldFiles[manifest["file"]] = fieldIndex  # TODO: add version overriding
+    fieldNames[manifest["name"]] = fieldIndex
+    fieldThemes[manifest["theme"]] = fieldIndex
+    for alias in manifest.get("aliases", ()):
+        fieldAliases[alias.upper()] = fieldIndex
+fields = FieldList([module for module, manifest in fieldManifests])
+
+
+def findField(search):
+    '''Return the index of the field matching search, or None.
+search can be an index, or a field's file, name, theme or one of its
+aliases. Aliases are not case sensitive.'''
+    if isinstance(search, int) and 0 <= search < len(fields):
+        return search
+    for lookup in (fieldFiles, fieldNames, fieldThemes):
+        if search in lookup:
+            return lookup[search]
+    if isinstance(search, str):
+        return fieldAliases.get(search.upper(), None)
+    return None
@@ -0,0 +1,154 @@
+'''Per-stage frame timings, for finding out where a slow frame went.
+
+Radar splits each frame into STAGES and FrameStats keeps the time spent in
+each of them for the last few hundred frames, in a fixed size ring buffer.
+A Radar without frameStats doesn't time anything, so this costs nothing
+unless it is turned on (VIDEO.FRAME_STATS, or the overlay).'''
+
+import json
+import time
+
+import numpy as np
+
+# In the order they happen. "input" is latching the robot positions,
+# "shapes" is building the robots' shapes, "unitify" is converting them to
+# meters (only without BATCH_TRANSFORM, templates have it done already),
+# "transform" is converting to screen coordinates, "raster" is drawing and
+# "present" is getting the frame onto the screen.
+STAGES = ("input", "shapes", "unitify", "transform", "raster", "present")
+
+
+class FrameStats:
+
+    def __init__(self, size=300, dumpPath=None, dumpInterval=5):
+        self.size = size
+        self.dumpPath = dumpPath
+        self.dumpInterval = dumpInterval
+        # One row per frame, the stages followed by the total.
+        self._times = np.zeros((size, len(STAGES) + 1))
+        self._ends = np.zeros(size)
+        self._count = 0
+        self._current = np.zeros(len(STAGES) + 1)
+        self._start = None
+        self._last = None
+        self._rendered = False
+        self._lastDump = time.monotonic()
+
+    def begin(self):
+        '''Start timing a frame. A frame that was rendered but never
+presented is recorded without a present time. Calling this while a frame is
+still being built does nothing, so needsRender and the render that follows
+count as one frame.'''
+        if self._rendered:
+            self._commit()
+        if self._start is None:
+            self._start = self._last = time.perf_counter()
+
+    def mark(self, stage):
+        '''Add the time since the last mark to stage.'''
+        now = time.perf_counter()
+        self._current[STAGES.index(stage)] += now - self._last
+        self._last = now
+
+    def rendered(self):
+        '''The frame is drawn, everything since the last mark was raster.'''
+        self.mark("raster")
+        self._rendered = True
+
+    def presented(self):
+        '''The frame is on screen, record it.'''
+        if not self._rendered:
+            return
+        self.mark("present")
+        self._commit()
+
+    def cancel(self):
+        '''Throw away the frame being built, needsRender decided there is
+nothing to draw.'''
+        if not self._rendered:
+            self._start = None
+            self._current[:] = 0
+
+    def _commit(self):
+        i = self._count % self.size
+        self._current[-1] = self._last - self._start
+        self._times[i] = self._current
+        self._ends[i] = self._last
+        self._count += 1
+        self._current[:] = 0
+        self._start = None
+        self._rendered = False
+        if self.dumpPath is not None and \
+                time.monotonic() - self._lastDump >= self.dumpInterval:
+            self.dump(self.dumpPath)
+
+    def __len__(self):
+        return min(self._count, self.size)
+
+    def fps(self):
+        '''Frames per second over the buffered frames.'''
+        n = len(self)
+        if n < 2:
+            return 0.0
+        newest = (self._count - 1) % self.size
+        oldest = (self._count - n) % self.size
+        span = self._ends[newest] - self._ends[oldest]
+        return (n - 1) / span if span > 0 else 0.0
+
+    def summary(self):
+        '''{stage: {"mean_ms", "p50_ms", "p90_ms", "p99_ms", "max_ms"}} over
+the buffered frames, with "total" for whole frames.'''
+        n = len(self)
+        times = self._times[:n] * 1000
+        result = {}
+        for i, stage in enumerate(STAGES + ("total",)):
+            if n:
+                t = times[:, i]
+                p50, p90, p99 = np.percentile(t, (50, 90, 99))
+                result[stage] = {
+                    "mean_ms": float(t.mean()),
+                    "p50_ms": float(p50),
+                    "p90_ms": float(p90),
+                    "p99_ms": float(p99),
+                    "max_ms": float(t.max())
+                    }
+            else:
+                result[stage] = {
+                    "mean_ms": 0.0,
+                    "p50_ms": 0.0,
+                    "p90_ms": 0.0,
+                    "p99_ms": 0.0,
+                    "max_ms": 0.0
+                    }
+        return result
+
+    def report(self):
+        return {
+            "frames": len(self),
+            "fps": self.fps(),
+            "stages": self.summary()
+            }
+
+    def format_lines(self, summary=None):
+        '''Short lines for the overlay: fps, then p50/max of each stage.'''
+        if summary is None:
+            summary = self.summary()
+        lines = ["{:5.1f} fps".format(self.fps())]
+        for stage in STAGES + ("total",):
+            lines.append("{:<9} {:6.2f} {:6.2f} ms".format(
+                stage,
+                summary[stage]["p50_ms"],
+                summary[stage]["max_ms"]
+                ))
+        return lines
+
+    def dump(self, path):
+        '''Write report() to path as JSON.'''
+        self._lastDump = time.monotonic()
+        data = self.report()
+        data["time"] = time.time()
+        try:
+            with open(path, "w") as f:
+                json.dump(data, f, indent=2)
+        except OSError as e:
+            print("Couldn't write frame stats to {}: {}".format(path, e))
@@ -0,0 +1,201 @@
+'''Unit-free geometry used by the renderers.
+
+Fields are compiled once into shape_record.Shape records with float64
+points in base units (meters), with colors and style flags already
+resolved. Getting a shape onto the screen is then a single affine
+transform.'''
+
+import collections
+import math
+
+import numpy as np
+
+try:
+    from roboradar import shape_record
+    from roboradar import units
+except ImportError:
+    import shape_record
+    import units
+
+BASE_UNITS = units.BASE_UNITS
+
+TEMPLATE_CACHE_SIZE = 256
+
+_compiledFields = {}
+_templates = collections.OrderedDict()
+
+
+color_hex = shape_record.color_hex
+
+
+def compile_style(shape):
+    '''The style of a PSF1 shape dict or Shape, as a Shape without
+points.'''
+    return shape_record.to_shape(shape).withPoints(None)
+
+
+def compile_shape(shape, scale):
+    '''Build a unit-free Shape from a PSF1 shape dict or Shape.
+points are multiplied by scale, so they end up in BASE_UNITS.'''
+    if isinstance(shape, shape_record.Shape):
+        return shape.withPoints(shape.points * scale)
+    return shape_record.from_dict(shape, scale)
+
+
+def compile_field(field):
+    '''Compile a PSF1 field module. The module's Data dict is left untouched
+and the result is shared by every Radar that loads the same field.'''
+    data = field.Data
+    key = (data["file"], data["version"])
+    compiled = _compiledFields.get(key, None)
+    if compiled is not None:
+        return compiled
+    scale = units.scale(data["units"])
+    compiled = {
+        "name": data["name"],
+        "file": data["file"],
+        "version": data["version"],
+        "orientation": data["orientation"],
+        "width": data["width"] * scale,
+        "height": data["height"] * scale,
+        "center": (data["center"][0] * scale, data["center"][1] * scale),
+        "static-shapes": [
+            compile_shape(
+                shape,
+                units.scale(shape["unit"]) if "unit" in shape else scale
+                )
+            for shape in data["static-shapes"]
+            ]
+        }
+    _compiledFields[key] = compiled
+    return compiled
+
+
+def screen_transform(field, size):
+    '''Return the 3x3 affine matrix mapping field space to a size sized
+surface. Field y points up, screen y points down.'''
+    sx = size[0] / field["width"]
+    sy = size[1] / field["height"]
+    return np.array((
+        (sx, 0.0, field["center"][0] * sx),
+        (0.0, -sy, field["center"][1] * sy),
+        (0.0, 0.0, 1.0)
+        ))
+
+
+def same_style(a, b):
+    '''Compare two Shapes, ignoring their points.'''
+    return a.sameStyle(b)
+
+
+def transform_points(matrix, points, offset=(0, 0), dtype=np.int32):
+    '''Apply matrix to an (n, 2) array and return screen points, truncated
+to int32 unless another dtype is given.'''
+    p = points @ matrix[:2, :2].T
+    p += (matrix[0, 2] + offset[0], matrix[1, 2] + offset[1])
+    return p.astype(dtype, copy=False)
+
+
+class Template:
+    '''The local-space geometry of a DynamicShape, compiled once.
+shapes holds the styles as Shapes without points (see compile_style),
+points every point of every shape stacked into one float64 array, and
+counts the number of points belonging to each shape.'''
+
+    def __init__(self, key, shapes):
+        shapes = [shape_record.to_shape(shape) for shape in shapes]
+        self.key = key
+        self.shapes = [shape.withPoints(None) for shape in shapes]
+        self.counts = [len(shape.points) for shape in shapes]
+        self.points = _stack(shapes)
+        self._unitScales = _unit_scales(shapes)
+
+    def localPoints(self, scale):
+        '''points for a pose that scales by scale (see
+DynamicShape.getMatrix). Shapes with a unit of their own are converted so
+that they still come out in that unit.'''
+        if self._unitScales is None:
+            return self.points
+        return _convert_units(self.points, self._unitScales, scale)
+
+
+def _stack(shapes):
+    if not shapes:
+        return np.empty((0, 2), dtype=np.float64)
+    return np.concatenate([shape.points for shape in shapes])
+
+
+def _unit_scales(shapes):
+    '''units.scale of every point's shape, 0 for shapes without a unit of
+their own, or None if no shape has one.'''
+    if all(shape.unit is None for shape in shapes):
+        return None
+    return np.repeat(
+        [0.0 if s.unit is None else units.scale(s.unit) for s in shapes],
+        [len(s.points) for s in shapes]
+        )
+
+
+def _convert_units(points, unitScales, scale):
+    factor = np.where(unitScales, unitScales / scale, 1.0)
+    return points * factor[:, None]
+
+
+def get_template(key, build):
+    '''Return the shared Template for key. build is only called, and should
+return the shape dicts or Shapes, when key isn't cached.'''
+    template = _templates.get(key, None)
+    if template is None:
+        template = Template(key, build())
+        _templates[key] = template
+        if len(_templates) > TEMPLATE_CACHE_SIZE:
+            _templates.popitem(last=False)
+    else:
+        _templates.move_to_end(key)
+    return template
+
+
+def batch_transform(groups, matrix, offset=(0, 0), dtype=np.int32):
+    '''Transform the points of many shapes in one vectorized pass.
+groups is a sequence of (shapes, pose) pairs. shapes is either a Template
+or a list of Shapes, and pose is the 3x3 matrix taking their points
+to BASE_UNITS field space (see DynamicShape.getMatrix). Each point goes
+through matrix @ pose.
+Returns (vertices, offsets): an (n, 2) array of dtype and the shape offsets
+into it, so shape i owns vertices[offsets[i]:offsets[i + 1]].'''
+    arrays = []
+    counts = []
+    groupCounts = []
+    poses = []
+    for shapes, pose in groups:
+        # Shapes with their own unit are scaled by that instead of the
+        # pose's scale.
+        scale = math.hypot(pose[0][0], pose[1][0])
+        if isinstance(shapes, Template):
+            arrays.append(shapes.localPoints(scale))
+            counts.extend(shapes.counts)
+            groupCounts.append(len(shapes.points))
+        else:
+            points = _stack(shapes)
+            unitScales = _unit_scales(shapes)
+            if unitScales is not None:
+                points = _convert_units(points, unitScales, scale)
+            arrays.append(points)
+            counts.extend(len(shape.points) for shape in shapes)
+            groupCounts.append(len(points))
+        poses.append(pose)
+    offsets = np.zeros(len(counts) + 1, dtype=np.intp)
+    np.cumsum(counts, out=offsets[1:])
+    if not offsets[-1]:
+        return np.empty((0, 2), dtype=dtype), offsets
+    composite = np.matmul(matrix, np.asarray(poses))[:, :2, :]
+    composite[:, 0, 2] += offset[0]
+    composite[:, 1, 2] += offset[1]
+    coef = np.repeat(composite, groupCounts, axis=0)
+    p = np.concatenate(arrays)
+    x = coef[:, 0, 0] * p[:, 0] + coef[:, 0, 1] * p[:, 1] + coef[:, 0, 2]
+    y = coef[:, 1, 0] * p[:, 0] + coef[:, 1, 1] * p[:, 1] + coef[:, 1, 2]
+    vertices = np.empty((len(p), 2), dtype=dtype)
+    vertices[:, 0] = x
+    vertices[:, 1] = y
+    return vertices, offsets
@@ -0,0 +1,81 @@
+'''Smooth robot motion between network updates.
+
+Robots publish their pose at 50 Hz or less, while the display runs faster.
+Instead of showing the newest pose until the next one arrives, every frame
+evaluates the pose at "now - delay" from the recent samples: interpolating
+between the two around that time, or extrapolating from the newest two if
+it is past the newest sample. A bigger delay means more interpolation and
+smoother motion, a smaller one less latency and more guessing.'''
+
+import collections
+import math
+
+
+def _angle(a, b, f):
+    '''Interpolate between angles a and b the short way round.'''
+    return a + ((b - a + math.pi) % (2 * math.pi) - math.pi) * f
+
+
+def _lerp(a, b, f):
+    return (
+        a[1] + (b[1] - a[1]) * f,
+        a[2] + (b[2] - a[2]) * f,
+        _angle(a[3], b[3], f)
+        )
+
+
+class PoseBuffer:
+    '''The last capacity (time, x, y, r) samples of one robot, with r in
+radians. Not thread safe, the caller has to lock.'''
+
+    def __init__(self, capacity=32, coalesce=0.002):
+        self.coalesce = coalesce
+        self._samples = collections.deque(maxlen=capacity)
+
+    def __len__(self):
+        return len(self._samples)
+
+    def push(self, t, x, y, r):
+        s = self._samples
+        if s and t - s[-1][0] < self.coalesce:
+            # x, y and r arrive as separate NetworkTables entries, updates
+            # this close together are parts of the same sample.
+            s[-1] = (s[-1][0], x, y, r)
+        else:
+            s.append((t, x, y, r))
+
+    def clear(self):
+        self._samples.clear()
+
+    def samples(self):
+        '''An immutable copy of the samples, oldest first.'''
+        return tuple(self._samples)
+
+    def sample(self, t, maxExtrapolation):
+        return sample(self._samples, t, maxExtrapolation)
+
+
+def sample(samples, t, maxExtrapolation):
+    '''Return (x, y, r) at time t from a sequence of (time, x, y, r)
+samples, oldest first, or None if there are none. Past the newest sample
+the motion is extrapolated for up to maxExtrapolation seconds, then eased
+back to the newest sample over as long again, and that is where it stays.
+Updates only come when something changes, so a robot that stops or is
+reset sends nothing more.'''
+    s = samples
+    if not s:
+        return None
+    newest = s[-1]
+    if t >= newest[0]:
+        dt = t - newest[0]
+        if len(s) < 2 or dt >= 2 * maxExtrapolation:
+            return newest[1:]
+        prev = s[-2]
+        dt = min(dt, 2 * maxExtrapolation - dt)
+        return _lerp(prev, newest, 1 + dt / (newest[0] - prev[0]))
+    for i in range(len(s) - 1, 0, -1):
+        a = s[i - 1]
+        if a[0] <= t:
+            b = s[i]
+            return _lerp(a, b, (t - a[0]) / (b[0] - a[0]))
+    return s[0][1:]
@@ -0,0 +1,120 @@
+'''Discovery of field and robot plugin modules without importing them.
+
+Plugin modules are found by file name and their manifests are read
+statically with ast. The manifests are cached in an index file next to the
+modules, keyed by modification time and size, so unchanged modules aren't
+even parsed. Modules are only imported once they are actually used.'''
+
+import ast
+import importlib
+import json
+import os
+
+try:
+    from roboradar import startup
+except ImportError:
+    import startup
+
+INDEX_FILE = ".plugin-index.json"
+# Bump when the format of the manifests changes.
+INDEX_VERSION = 1
+
+
+def data_manifest(path, keys=("file", "name", "theme", "version", "aliases")):
+    '''Read keys from a module level "Data = {...}" dict. Only values that
+are literals can be read, None is returned if there is no such dict.'''
+    with open(path) as f:
+        tree = ast.parse(f.read(), path)
+    for node in tree.body:
+        if not isinstance(node, ast.Assign) \
+                or not isinstance(node.value, ast.Dict):
+            continue
+        if not any(
+                isinstance(t, ast.Name) and t.id == "Data"
+                for t in node.targets):
+            continue
+        manifest = {}
+        for k, v in zip(node.value.keys, node.value.values):
+            if isinstance(k, ast.Constant) and k.value in keys:
+                try:
+                    value = ast.literal_eval(v)
+                except ValueError:
+                    continue
+                if isinstance(value, (set, frozenset, tuple)):
+                    value = sorted(value)
+                manifest[k.value] = value
+        return manifest
+    return None
+
+
+def types_manifest(path):
+    '''Read the keys of a module level "types = {...}" dict, which maps
+robot type names to classes. None is returned if they can't be read.'''
+    with open(path) as f:
+        tree = ast.parse(f.read(), path)
+    for node in tree.body:
+        if not isinstance(node, ast.Assign) \
+                or not isinstance(node.value, ast.Dict):
+            continue
+        if not any(
+                isinstance(t, ast.Name) and t.id == "types"
+                for t in node.targets):
+            continue
+        names = []
+        for k in node.value.keys:
+            if not isinstance(k, ast.Constant) or not isinstance(k.value, str):
+                return None
+            names.append(k.value)
+        return {"types": names}
+    return None
+
+
+def scan(directory, read):
+    '''Return {module name: manifest} for the plugin modules in directory.
+read(path) returns a module's manifest, or None if the module has to be
+imported to find out.'''
+    indexPath = os.path.join(directory, INDEX_FILE)
+    try:
+        with open(indexPath) as f:
+            index = json.load(f)
+        if index.get("version") != INDEX_VERSION:
+            index = {}
+    except (OSError, ValueError):
+        index = {}
+    entries = index.get("modules", {})
+    modules = {}
+    changed = False
+    for file in sorted(os.listdir(directory)):
+        if not file.endswith(".py") or file == "__init__.py":
+            continue
+        path = os.path.join(directory, file)
+        stat = os.stat(path)
+        stamp = [stat.st_mtime, stat.st_size]
+        entry = entries.get(file, None)
+        if entry is None or entry["stamp"] != stamp:
+            entry = {"stamp": stamp, "manifest": read(path)}
+            changed = True
+        modules[file[:-3]] = entry["manifest"]
+        entries[file] = entry
+    if changed or len(entries) != len(modules):
+        index = {
+            "version": INDEX_VERSION,
+            "modules": {
+                name + ".py": entries[name + ".py"] for name in modules
+                }
+            }
+        # The index is only an optimization, installs may be read-only.
+        try:
+            with open(indexPath, "w") as f:
+                json.dump(index, f)
+        except OSError:
+            pass
+    return modules
+
+
+def load(name, package):
+    '''Import the plugin module name from package.'''
+    with startup.phase("plugin import: {}".format(name)):
+        if package:
+            return importlib.import_module("." + name, package=package)
+        return importlib.import_module(name)
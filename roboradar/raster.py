@@ -0,0 +1,94 @@
+'''Vectorized rasterizer for the numpy VideoEngine.
+
+Everything draws straight into an HxWx3 uint8 array, so no display is
+needed. Points are int screen coordinates, as returned by
+Radar._convertCoordinateSpace.'''
+
+import numpy as np
+
+
+def new_framebuffer(dimensions, color=(0, 0, 0)):
+    '''dimensions is (width, height), like everywhere else in Radar.'''
+    buf = np.empty((dimensions[1], dimensions[0], 3), dtype=np.uint8)
+    buf[:] = color
+    return buf
+
+
+def rescale(buf, dimensions):
+    '''Nearest neighbour resize, only meant for short-lived placeholders.'''
+    h, w = buf.shape[:2]
+    ys = np.arange(dimensions[1]) * h // max(dimensions[1], 1)
+    xs = np.arange(dimensions[0]) * w // max(dimensions[0], 1)
+    return buf[ys[:, None], xs]
+
+
+def fill_polygon(buf, points, color):
+    '''Scanline fill using the even-odd rule.
+All scanlines are solved at once: every edge is intersected with every row
+of the polygon's bounding box, and the spans are accumulated in a
+difference array so the fill itself is a single masked assignment.'''
+    p = np.asarray(points, dtype=np.float64)
+    if len(p) < 3:
+        return
+    h, w = buf.shape[:2]
+    top = max(int(np.floor(p[:, 1].min())), 0)
+    bottom = min(int(np.ceil(p[:, 1].max())), h)
+    left = max(int(np.floor(p[:, 0].min())), 0)
+    right = min(int(np.ceil(p[:, 0].max())), w)
+    if bottom <= top or right <= left:
+        return
+    a = p
+    b = np.roll(p, -1, axis=0)
+    sloped = a[:, 1] != b[:, 1]
+    a, b = a[sloped], b[sloped]
+    ys = np.arange(top, bottom, dtype=np.float64)[:, None]
+    lo = np.minimum(a[:, 1], b[:, 1])
+    hi = np.maximum(a[:, 1], b[:, 1])
+    crosses = (lo <= ys) & (ys < hi)
+    # Horizontal edges were dropped above, so this never divides by zero.
+    slope = (b[:, 0] - a[:, 0]) / (b[:, 1] - a[:, 1])
+    xs = a[:, 0] + (ys - a[:, 1]) * slope
+    xs = np.where(crosses, xs, np.inf)
+    xs.sort(axis=1)
+    if xs.shape[1] % 2:
+        xs = xs[:, :-1]
+    starts = xs[:, 0::2]
+    ends = xs[:, 1::2]
+    valid = np.isfinite(ends)
+    rows = np.broadcast_to(np.arange(len(ys))[:, None], starts.shape)[valid]
+    span = right - left
+    starts = np.clip(np.ceil(starts[valid]) - left, 0, span).astype(np.intp)
+    ends = np.clip(np.ceil(ends[valid]) - left, 0, span).astype(np.intp)
+    diff = np.zeros((len(ys), span + 1), dtype=np.int16)
+    np.add.at(diff, (rows, starts), 1)
+    np.add.at(diff, (rows, ends), -1)
+    mask = np.cumsum(diff[:, :span], axis=1) > 0
+    buf[top:bottom, left:right][mask] = color
+
+
+def draw_segments(buf, starts, ends, color):
+    '''Draw many line segments at once with a vectorized DDA.'''
+    starts = np.asarray(starts, dtype=np.float64).reshape(-1, 2)
+    ends = np.asarray(ends, dtype=np.float64).reshape(-1, 2)
+    if not len(starts):
+        return
+    h, w = buf.shape[:2]
+    delta = ends - starts
+    steps = np.abs(delta).max(axis=1).astype(np.intp) + 1
+    seg = np.repeat(np.arange(len(steps)), steps)
+    t = np.arange(steps.sum()) - np.repeat(np.cumsum(steps) - steps, steps)
+    frac = t / np.maximum(steps - 1, 1)[seg]
+    xs = np.rint(starts[seg, 0] + delta[seg, 0] * frac).astype(np.intp)
+    ys = np.rint(starts[seg, 1] + delta[seg, 1] * frac).astype(np.intp)
+    inside = (xs >= 0) & (xs < w) & (ys >= 0) & (ys < h)
+    buf[ys[inside], xs[inside]] = color
+
+
+def draw_polyline(buf, points, color, closed=False):
+    p = np.asarray(points)
+    if len(p) < 2:
+        return
+    if closed:
+        draw_segments(buf, p, np.roll(p, -1, axis=0), color)
+    else:
+        draw_segments(buf, p[:-1], p[1:], color)
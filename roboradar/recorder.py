@@ -0,0 +1,194 @@
+'''Recording of robot pose updates for post-match review.
+
+Every update a NetworkTableBot receives is appended to a log file as one
+fixed-width binary record: the whole pose after the update, plus a bitmask
+of which fields the update changed. Records are packed into a preallocated
+buffer and written out in blocks, so recording doesn't allocate per update.
+
+Log files are a 32 byte header followed by records, so open_log can map them
+straight into a numpy record array without parsing anything.'''
+
+import atexit
+import datetime
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+
+try:
+    from roboradar import config
+    from roboradar import units
+except ImportError:
+    import config
+    import units
+
+MAGIC = b"RRPOSE"
+FORMAT_VERSION = 1
+# magic, format version, record size, wall clock time at monotonic 0
+HEADER = struct.Struct("<6sHHd")
+HEADER_SIZE = 32
+# timestamp, x, y, r, w, h, meters per unit, robot, changed, color
+RECORD = struct.Struct("<dffffffHB3B")
+DTYPE = np.dtype([
+    ("timestamp", "<f8"),
+    ("x", "<f4"),
+    ("y", "<f4"),
+    ("r", "<f4"),
+    ("w", "<f4"),
+    ("h", "<f4"),
+    ("scale", "<f4"),
+    ("robot", "<u2"),
+    ("changed", "u1"),
+    ("color", "u1", (3,))
+    ])
+assert DTYPE.itemsize == RECORD.size
+
+# Bits of a record's changed field, by Pose field.
+CHANGED = {
+    "x": 1,
+    "y": 2,
+    "r": 4,
+    "units": 8,
+    "color": 16,
+    "w": 32,
+    "h": 64
+    }
+ALL_CHANGED = sum(CHANGED.values())
+
+
+class Recorder:
+    '''Appends pose records to path. Safe to use from several threads.
+Records are written to the file once blockSize of them are buffered, or
+by the first write flushInterval seconds after the last time they were.'''
+
+    def __init__(self, path, blockSize=256, flushInterval=1):
+        self.path = path
+        self.flushInterval = flushInterval
+        self._file = open(path, "wb")
+        header = bytearray(HEADER_SIZE)
+        HEADER.pack_into(
+            header,
+            0,
+            MAGIC,
+            FORMAT_VERSION,
+            RECORD.size,
+            time.time() - time.monotonic()
+            )
+        self._file.write(header)
+        self._buffer = bytearray(RECORD.size * blockSize)
+        self._used = 0
+        self._lastFlush = time.monotonic()
+        self._lock = threading.Lock()
+        self._robots = 0
+        atexit.register(self.close)
+
+    def attach(self):
+        '''Return a new robot number for this log.'''
+        with self._lock:
+            self._robots += 1
+            return self._robots - 1
+
+    def write(self, robot, pose, changed=ALL_CHANGED):
+        '''Record pose for robot. changed is a mask of CHANGED bits.'''
+        color = pose.color
+        with self._lock:
+            if self._file is None:
+                return
+            RECORD.pack_into(
+                self._buffer,
+                self._used,
+                pose.timestamp,
+                pose.x,
+                pose.y,
+                pose.r,
+                pose.w,
+                pose.h,
+                units.scale(pose.units),
+                robot,
+                changed,
+                int(color[0]),
+                int(color[1]),
+                int(color[2])
+                )
+            self._used += RECORD.size
+            if self._used == len(self._buffer) or \
+                    time.monotonic() - self._lastFlush >= self.flushInterval:
+                self._flush()
+
+    def _flush(self):
+        self._file.write(memoryview(self._buffer)[:self._used])
+        self._file.flush()
+        self._used = 0
+        self._lastFlush = time.monotonic()
+
+    def flush(self):
+        with self._lock:
+            if self._file is not None:
+                self._flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is None:
+                return
+            self._flush()
+            self._file.close()
+            self._file = None
+
+
+_recorder = None
+
+
+def default_recorder():
+    '''The shared Recorder for ROBOT.RECORD_DIR, or None if recording is
+off. Each run gets its own file, named after the time it started.'''
+    global _recorder
+    directory = config.get_config()["ROBOT"].get("RECORD_DIR", None)
+    if not directory:
+        return None
+    if _recorder is None:
+        directory = os.path.expanduser(directory)
+        os.makedirs(directory, exist_ok=True)
+        _recorder = Recorder(os.path.join(
+            directory,
+            datetime.datetime.now().strftime("poses-%Y%m%d-%H%M%S.rrpose")
+            ))
+    return _recorder
+
+
+def open_log(path):
+    '''Memory-map a log. Returns (header, records), where header is a dict
+and records a numpy record array with the fields of DTYPE. timestamp is
+time.monotonic() of the recording machine, add header["time_origin"] to
+get a Unix time. A record cut short by a crash is ignored.'''
+    with open(path, "rb") as f:
+        magic, version, size, origin = HEADER.unpack(
+            f.read(HEADER_SIZE)[:HEADER.size]
+            )
+    if magic != MAGIC:
+        raise ValueError("{} is not a pose log".format(path))
+    if version != FORMAT_VERSION or size != RECORD.size:
+        raise ValueError(
+            "{} has format version {}, only {} can be read".format(
+                path,
+                version,
+                FORMAT_VERSION
+                ))
+    count = (os.path.getsize(path) - HEADER_SIZE) // RECORD.size
+    header = {
+        "version": version,
+        "record_size": size,
+        "time_origin": origin,
+        "records": count
+        }
+    if count == 0:
+        return header, np.zeros(0, DTYPE).view(np.recarray)
+    records = np.memmap(
+        path,
+        dtype=DTYPE,
+        mode="r",
+        offset=HEADER_SIZE,
+        shape=(count,)
+        )
+    return header, records.view(np.recarray)
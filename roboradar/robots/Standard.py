@@ -2,32 +2,47 @@
 
 import logging
 from networktables import NetworkTables
-from . import Robot, config
+from . import BoxShapes, PoseRobot, config, startup
 
 logging.basicConfig(level=logging.DEBUG)
 
 
-class NetworkTableBot(Robot):
+def tableName(index):
+    '''NetworkTables table of robot number index: RoboRadar, RoboRadar1,
+RoboRadar2 and so on.'''
+    return "RoboRadar" + (str(index) if index else "")
 
-    def __init__(self, *args, **kwargs):
-        conf = config.get_config()
-        NetworkTables.initialize(server=kwargs.get(
-            "server",
-            conf["ROBOT"]["IP_ADDRESS"]
-            ))
-        self.nt = NetworkTables.getTable("RoboRadar")
 
-    @property
-    def x(self):
-        return self.nt.getNumber("posX", 0)
-
-    @property
-    def y(self):
-        return self.nt.getNumber("posY", 0)
+class NetworkTableBot(PoseRobot):
+    # NetworkTables key -> Pose field
+    _keys = {
+        "posX": "x",
+        "posY": "y",
+        "posR": "r",
+        "unitsLinear": "units",
+        "color": "color"
+        }
 
-    @property
-    def r(self):
-        return self.nt.getNumber("posR", 0)
+    def __init__(self, *args, **kwargs):
+        conf = config.get_config()
+        with startup.phase("NetworkTables initialize"):
+            NetworkTables.initialize(server=kwargs.get(
+                "server",
+                conf["ROBOT"]["IP_ADDRESS"]
+                ))
+        self.nt = NetworkTables.getTable(tableName(kwargs.get("index", 0)))
+        super().__init__(*args, **kwargs)
+        self.nt.addEntryListener(self._onEntry, immediateNotify=True)
+        self._startAcquisition(kwargs)
+
+    def _onEntry(self, table, key, value, isNew):
+        '''Called from the NetworkTables thread.'''
+        field = self._keys.get(key, None)
+        if field is None:
+            return
+        if field == "color":
+            value = tuple(value)
+        self._update(**{field: value})
 
     '''@property
     def rsin(self):
@@ -41,28 +56,13 @@ class NetworkTableBot(Robot):
     def rtan(self):
         return self.nt.getNumber("posRTan", 0)'''
 
-    @property
-    def units(self):
-        return self.nt.getString("unitsLinear", "inch")
-
-    def getTeamColor(self):
-        # return purple if no color defined
-        return tuple(self.nt.getNumberArray("color", (255, 0, 255)))
 
-
-class BoxBot(NetworkTableBot):
+class BoxBot(BoxShapes, NetworkTableBot):
+    _keys = dict(NetworkTableBot._keys, boxbotW="w", boxbotH="h")
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-    @property
-    def w(self):
-        return self.nt.getNumber("boxbotW", 27)
-
-    @property
-    def h(self):
-        return self.nt.getNumber("boxbotH", 32)
-
     @classmethod
     def getInfo(cls):
         data = {
@@ -71,65 +71,6 @@ class BoxBot(NetworkTableBot):
             }
         return data
 
-    def getShapes(self):
-        w = self.w / 2
-        h = self.h / 2
-        shapes = [
-            {
-                 "name": "bumpers",
-                 "type": "polygon",
-                 "style": ("filled", "aa"),
-                 "color": self.getTeamColor(),
-                 "layer": 0,
-                 "coordinate-space": "local",
-                 "points": [
-                     (-(w+3.25), (h+3.25)),
-                     ((w+3.25), (h+3.25)),
-                     ((w+3.25), -(h+3.25)),
-                     (-(w+3.25), -(h+3.25))
-                     ]
-                 },
-            {
-                "name": "frame",
-                "type": "polygon",
-                "style": ("filled", "aa"),
-                "color": (128, 128, 128),
-                "layer": 0,
-                "coordinate-space": "local",
-                "points": [
-                    (-w, h),
-                    (w, h),
-                    (w, -h),
-                    (-w, -h)
-                    ]
-                },
-            {
-                "name": "pointer",
-                "type": "line",
-                "style": ("outline"),
-                "color": (0, 0, 0),
-                "layer": 0,
-                "coordinate-space": "local",
-                "points": [
-                    (0, 0),
-                    (0, h),
-                    ]
-                },
-            {
-                "name": "arrow",
-                "type": "line",
-                "style": ("outline"),
-                "color": (0, 255, 0),
-                "layer": 0,
-                "coordinate-space": "local",
-                "points": [
-                    (0, 0),
-                    (0, (h+8)),
-                    ]
-                }
-            ]
-        return shapes
-
 
 # print(BoxBot())
 
@@ -0,0 +1,53 @@
+#!/usr/bin/python3
+
+from . import BoxShapes, Pose, PoseRobot, config
+# Only here, so importing roboradar doesn't have to load asyncio.
+try:
+    from roboradar import udp
+except ImportError:
+    import udp
+
+
+class UDPBot(PoseRobot):
+    '''A robot that sends its pose as UDP datagrams (see roboradar.udp),
+in meters and radians. Robot number index listens on UDP_PORT + index.'''
+    defaultPose = Pose(0, 0, 0, 0, "meter", (255, 0, 255), 0.6858, 0.8128)
+
+    def __init__(self, *args, **kwargs):
+        conf = config.get_config()
+        super().__init__(*args, **kwargs)
+        self._receiver = udp.Receiver(self._onPose)
+        self.address = self._receiver.start(
+            kwargs.get("host", conf["ROBOT"].get("UDP_HOST", "0.0.0.0")),
+            kwargs.get("port", conf["ROBOT"].get("UDP_PORT", udp.PORT))
+            + kwargs.get("index", 0)
+            )
+        self._startAcquisition(kwargs)
+
+    def _onPose(self, timestamp, fields):
+        '''Called from the receiver's thread.'''
+        self._update(timestamp, **fields)
+
+    @property
+    def dropped(self):
+        '''Number of datagrams dropped as invalid, repeated or late.'''
+        return self._receiver.protocol.dropped
+
+    def close(self):
+        self._receiver.close()
+
+
+class UDPBoxBot(BoxShapes, UDPBot):
+
+    @classmethod
+    def getInfo(cls):
+        data = {
+            "name": "UDPBoxBot",
+            "author": "RoboRadar"
+            }
+        return data
+
+
+types = {
+    "UDPBoxBot": UDPBoxBot
+    }
@@ -1,21 +1,44 @@
 #!/usr/bin/python3
 
-import importlib
+import collections
+import collections.abc
 import os
+import threading
+import time
 from abc import abstractmethod
 
 import sys
 sys.path.append("..")
 
 try:
+    from roboradar import acquisition
     from roboradar import config
     from roboradar import dynamic_shape
+    from roboradar import interpolation
+    from roboradar import plugins
+    from roboradar import recorder
+    from roboradar import startup
+    from roboradar import units
 except ImportError:
+    import acquisition
     import config
     import dynamic_shape
+    import interpolation
+    import plugins
+    import recorder
+    import startup
+    import units
 conf = config.get_config()
 
 
+# One consistent reading of a robot. timestamp is time.monotonic() when the
+# newest value arrived, w and h are only meaningful for box shaped robots.
+Pose = collections.namedtuple(
+    "Pose",
+    ("timestamp", "x", "y", "r", "units", "color", "w", "h")
+    )
+
+
 class Robot(dynamic_shape.DynamicShape):
 
     @classmethod
@@ -26,17 +49,238 @@ see the docs (to be made) for more info'''
         pass
 
 
-def getRobots():
-    robots = {}
-    for f in os.listdir(__file__[:-11]):
-        if f.endswith(".py") and f != "__init__.py":
-            if __package__:
-                module = "." + f[:-3]
-            else:
-                module = f[:-3]
-            mod = importlib.import_module(
-                module,
-                package=__package__
+class PoseRobot(Robot):
+    '''Base for robots whose pose is pushed to them by another thread,
+like a NetworkTables listener or a socket. The source calls _update from its
+thread; each update swaps in a new immutable Pose, so readers never see a
+half written one. Subclasses call _startAcquisition once updates are set up.'''
+    # return purple if no color defined
+    defaultPose = Pose(0, 0, 0, 0, "inch", (255, 0, 255), 27, 32)
+
+    def __init__(self, *args, **kwargs):
+        self._snapshot = self.defaultPose._replace(timestamp=time.monotonic())
+        self._frame = self._snapshot
+        self._lock = threading.Lock()
+        self.interpolate = kwargs.get(
+            "interpolate",
+            conf["ROBOT"].get("POSE_INTERPOLATION", True)
+            )
+        self.poseDelay = kwargs.get(
+            "poseDelay",
+            conf["ROBOT"].get("POSE_DELAY_MS", 20) / 1000
+            )
+        self.maxExtrapolation = kwargs.get(
+            "maxExtrapolation",
+            conf["ROBOT"].get("POSE_MAX_EXTRAPOLATION_MS", 50) / 1000
+            )
+        self._poses = interpolation.PoseBuffer()
+        self._recorder = kwargs.get("recorder", recorder.default_recorder())
+        if self._recorder is not None:
+            self._recordNumber = self._recorder.attach()
+            self._recorder.write(self._recordNumber, self._snapshot)
+        self._acquisition = None
+
+    def _startAcquisition(self, kwargs):
+        self._acquisition = kwargs.get(
+            "acquisition",
+            acquisition.default_acquisition()
+            )
+        if self._acquisition is not None:
+            self._slot = self._acquisition.register(self)
+
+    def _update(self, timestamp=None, **changes):
+        '''Apply changes, a dict of Pose fields, from the source's thread.
+timestamp is the time.monotonic() the values are from, now if None.'''
+        if timestamp is None:
+            timestamp = time.monotonic()
+        with self._lock:
+            snapshot = self._snapshot._replace(timestamp=timestamp, **changes)
+            self._snapshot = snapshot
+            if "units" in changes:
+                # Old samples are in the old units.
+                self._poses.clear()
+            if "x" in changes or "y" in changes or "r" in changes:
+                self._poses.push(
+                    snapshot.timestamp,
+                    snapshot.x,
+                    snapshot.y,
+                    snapshot.r
+                    )
+            if self._recorder is not None:
+                self._recorder.write(
+                    self._recordNumber,
+                    snapshot,
+                    sum(recorder.CHANGED[field] for field in changes)
+                    )
+
+    def snapshot(self):
+        '''Return the newest Pose.'''
+        return self._snapshot
+
+    def acquire(self):
+        '''Return (newest Pose, pose samples), see acquisition.'''
+        with self._lock:
+            return self._snapshot, self._poses.samples()
+
+    def beginFrame(self):
+        '''Latch the pose for this frame. With interpolate on, the position
+and heading are those at poseDelay seconds ago, interpolated between the
+updates around then (see interpolation).
+With an acquisition thread the state comes from its front buffer, so this
+never waits for the source's thread.'''
+        if self._acquisition is not None:
+            snapshot, samples = self._acquisition.front[self._slot]
+        else:
+            snapshot, samples = self.acquire()
+        if self.interpolate:
+            pose = interpolation.sample(
+                samples,
+                time.monotonic() - self.poseDelay,
+                self.maxExtrapolation
                 )
-            robots.update(mod.types)
-    return robots
+            if pose is not None:
+                snapshot = snapshot._replace(x=pose[0], y=pose[1], r=pose[2])
+        self._frame = snapshot
+        return self._frame
+
+    def getStamp(self):
+        return self._frame
+
+    @property
+    def x(self):
+        return self._frame.x
+
+    @property
+    def y(self):
+        return self._frame.y
+
+    @property
+    def r(self):
+        return self._frame.r
+
+    @property
+    def units(self):
+        return self._frame.units
+
+    def getTeamColor(self):
+        return self._frame.color
+
+
+class BoxShapes:
+    '''Mixin drawing a PoseRobot as a rectangle of w by h with bumpers and
+a heading arrow.'''
+
+    @property
+    def w(self):
+        return self._frame.w
+
+    @property
+    def h(self):
+        return self._frame.h
+
+    def getTemplateKey(self):
+        return ("BoxBot", self.w, self.h, self.getTeamColor(), self.units)
+
+    def getShapes(self):
+        w = self.w / 2
+        h = self.h / 2
+        # Bumpers and the arrow are sized in inches, whatever units the
+        # robot uses.
+        inch = units.scale("inch") / units.scale(self.units)
+        bumper = 3.25 * inch
+        shapes = [
+            {
+                 "name": "bumpers",
+                 "type": "polygon",
+                 "style": ("filled", "aa"),
+                 "color": self.getTeamColor(),
+                 "layer": 0,
+                 "coordinate-space": "local",
+                 "points": [
+                     (-(w+bumper), (h+bumper)),
+                     ((w+bumper), (h+bumper)),
+                     ((w+bumper), -(h+bumper)),
+                     (-(w+bumper), -(h+bumper))
+                     ]
+                 },
+            {
+                "name": "frame",
+                "type": "polygon",
+                "style": ("filled", "aa"),
+                "color": (128, 128, 128),
+                "layer": 0,
+                "coordinate-space": "local",
+                "points": [
+                    (-w, h),
+                    (w, h),
+                    (w, -h),
+                    (-w, -h)
+                    ]
+                },
+            {
+                "name": "pointer",
+                "type": "line",
+                "style": ("outline"),
+                "color": (0, 0, 0),
+                "layer": 0,
+                "coordinate-space": "local",
+                "points": [
+                    (0, 0),
+                    (0, h),
+                    ]
+                },
+            {
+                "name": "arrow",
+                "type": "line",
+                "style": ("outline"),
+                "color": (0, 255, 0),
+                "layer": 0,
+                "coordinate-space": "local",
+                "points": [
+                    (0, 0),
+                    (0, (h+8*inch)),
+                    ]
+                }
+            ]
+        return shapes
+
+
+class RobotRegistry(collections.abc.Mapping):
+    '''Robot types by name. A robot module is only imported once one of
+its types is looked up.'''
+
+    def __init__(self, directory):
+        self._modules = {}
+        self._types = {}
+        for module, manifest in plugins.scan(
+                directory,
+                plugins.types_manifest).items():
+            if manifest is None:
+                # Can't be read statically, so it has to be imported.
+                manifest = {"types": list(self._load(module))}
+            for name in manifest["types"]:
+                self._modules[name] = module
+
+    def _load(self, module):
+        types = plugins.load(module, __package__).types
+        for name, cls in types.items():
+            self._types[name] = cls
+            self._modules[name] = module
+        return types
+
+    def __getitem__(self, name):
+        if name not in self._types:
+            if name not in self._modules:
+                raise KeyError(name)
+            self._load(self._modules[name])
+        return self._types[name]
+
+    def __iter__(self):
+        return iter(self._modules)
+
+    def __len__(self):
+        return len(self._modules)
+
+
+def getRobots():
+    return RobotRegistry(os.path.dirname(os.path.realpath(__file__)))
@@ -0,0 +1,195 @@
+'''What several Radars can show at once.
+
+A Scene holds the field and the DynamicShapes on it. Once per tick, update
+latches every DynamicShape and computes the geometry of all their shapes in
+world space, field meters. A Radar is one viewport onto a scene: it only
+applies its own screen transform to that geometry and draws it, so showing
+the same robots in more windows or views doesn't poll or build them again.
+
+    scene = Scene()
+    scene.loadField("FRC_2020")
+    scene.add_ds(robot)
+    overview = Radar((480, 640), "pygame", scene=scene)
+    closeup = Radar((480, 480), "pygame", scene=scene)
+    while True:
+        scene.update()
+        overview.pygame_render()
+        closeup.pygame_render()
+
+A Radar made without a scene gets one of its own, which it updates itself.'''
+
+import numpy as np
+
+try:
+    from roboradar import geometry
+    from roboradar import spatial
+    from roboradar import units
+    from roboradar.fields import fields, findField
+except ImportError:
+    import geometry
+    import spatial
+    import units
+    from fields import fields, findField
+
+IDENTITY = np.identity(3)
+
+
+def _skip(stage):
+    pass
+
+
+class Scene:
+    '''The field and DynamicShapes shared by every Radar showing them.
+After update, entries lists (ds, shape) for every shape and shape i has the
+world points vertices[offsets[i]:offsets[i + 1]]. version goes up every
+time they change.'''
+
+    def __init__(self, batchTransform=True):
+        self.batchTransform = batchTransform
+        self.dsArray = []
+        self.cnt = 0
+        self.fieldIndex = None
+        self.field = None
+        self.compiledField = None
+        self.units = None
+        self.version = 0
+        self.entries = []
+        self.vertices = np.empty((0, 2))
+        self.offsets = np.zeros(1, dtype=np.intp)
+        self.templatePoses = {}
+        self._stamps = None
+        self._bounds = None
+        self._boundsVersion = None
+
+    def loadField(self, search):
+        self.fieldIndex = findField(search)
+        if self.fieldIndex is None:
+            raise ValueError
+        self.field = fields[self.fieldIndex]
+        self.units = self.field.Data["units"]
+        self.compiledField = geometry.compile_field(self.field)
+        self._stamps = None
+
+    def add_ds(self, ds):
+        self.dsArray.append(ds)
+        ds.number = self.cnt
+        self.cnt += 1
+        self._stamps = None
+
+    def invalidate(self):
+        '''Make the next update recompute the geometry, even if no stamp
+changed.'''
+        self._stamps = None
+
+    def update(self, mark=_skip):
+        '''Start a tick: latch every DynamicShape and, if any of them
+changed, recompute the world geometry. Returns True if it did. mark is
+called with each frame stats stage as it finishes.'''
+        if self.compiledField is None:
+            return False
+        for ds in self.dsArray:
+            ds.beginFrame()
+        mark("input")
+        stamps = [ds.getStamp() for ds in self.dsArray]
+        if None not in stamps and stamps == self._stamps:
+            return False
+        self._stamps = stamps
+        if self.batchTransform:
+            self._transform(mark)
+        else:
+            self._draw(mark)
+        self.version += 1
+        return True
+
+    def _scale(self, ds):
+        unit = ds.units
+        if unit is None:
+            unit = self.units
+        return units.scale(unit)
+
+    def getPose(self, ds):
+        '''ds's 3x3 matrix in field meters, as of the last update.'''
+        entry = self.templatePoses.get(ds, None)
+        if entry is not None:
+            return entry[1]
+        return ds.getMatrix(
+            self.compiledField["orientation"],
+            self._scale(ds)
+            )
+
+    def getBounds(self):
+        '''The world bounding box of every shape in entries, as an (n, 4)
+array (see spatial.shape_bounds). Computed once per version.'''
+        if self._boundsVersion != self.version:
+            self._bounds = spatial.shape_bounds(self.vertices, self.offsets)
+            self._boundsVersion = self.version
+        return self._bounds
+
+    def _transform(self, mark):
+        '''Transform every shape of every DynamicShape in one batch (see
+geometry.batch_transform).'''
+        orientation = self.compiledField["orientation"]
+        groups = []
+        entries = []
+        poses = {}
+        for ds in self.dsArray:
+            pose = ds.getMatrix(orientation, self._scale(ds))
+            template = ds.getTemplate()
+            if template is None:
+                shapes = list(ds.drawLocal())
+                groups.append((shapes, pose))
+                entries.extend(
+                    (ds, geometry.compile_style(s)) for s in shapes
+                    )
+            else:
+                groups.append((template, pose))
+                entries.extend((ds, s) for s in template.shapes)
+                poses[ds] = (template, pose)
+        mark("shapes")
+        self.vertices, self.offsets = geometry.batch_transform(
+            groups,
+            IDENTITY,
+            dtype=np.float64
+            )
+        self.entries = entries
+        self.templatePoses = poses
+        mark("transform")
+
+    def _draw(self, mark):
+        '''The old path, one DynamicShape.draw at a time.'''
+        orientation = self.compiledField["orientation"]
+        entries = []
+        points = []
+        for ds in self.dsArray:
+            shapes = list(ds.draw(orientation))
+            mark("shapes")
+            self._unitify(shapes, self._scale(ds), (ds.x, ds.y))
+            mark("unitify")
+            for shape in shapes:
+                entries.append((ds, shape.withPoints(None)))
+                points.append(shape.points)
+        offsets = np.zeros(len(points) + 1, dtype=np.intp)
+        np.cumsum([len(p) for p in points], out=offsets[1:])
+        if points:
+            self.vertices = np.concatenate(points)
+        else:
+            self.vertices = np.empty((0, 2))
+        self.offsets = offsets
+        self.entries = entries
+        self.templatePoses = {}
+        mark("transform")
+
+    def _unitify(self, shapes, scale, origin=(0, 0)):
+        ''' This function handles making sure units are converted properly.
+Each Shape is replaced by its unit-free form (see geometry), scaled by
+scale. A shape with a unit of its own is sized in that unit instead, around
+origin, which is where its DynamicShape is and stays in scale's unit.
+'''
+        for shape in range(len(shapes)):
+            if shapes[shape].unit is None:
+                shapes[shape] = geometry.compile_shape(shapes[shape], scale)
+                continue
+            s = units.scale(shapes[shape].unit)
+            points = (shapes[shape].points - origin) * s
+            points += (origin[0] * scale, origin[1] * scale)
+            shapes[shape] = shapes[shape].withPoints(points)
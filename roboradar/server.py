@@ -0,0 +1,302 @@
+'''Watching the radar from a browser.
+
+py -m roboradar --serve renders without a window and streams the frames
+over HTTP, so the pit, coaches and scouts can all watch over one
+NetworkTables connection to the robot. Every frame is rendered and encoded
+once and the same bytes go to every viewer. Viewers that can't keep up
+skip frames instead of having them queued.
+
+    /        a page showing the stream
+    /stream  multipart/x-mixed-replace, one image per frame (MJPEG with
+             the jpeg format)
+    /frame   the next frame, as one image
+
+Only frames that look different are rendered and sent, and nothing is
+rendered while nobody is watching.'''
+
+import asyncio
+import io
+import os
+import threading
+import time
+
+try:
+    import roboradar
+except ImportError:
+    import __init__ as roboradar
+
+# The bottom of the team range, udp.PORT takes the top one.
+PORT = 5800
+BOUNDARY = b"roboradar-frame"
+FORMATS = {
+    "jpeg": ("image/jpeg", "frame.jpg"),
+    "png": ("image/png", "frame.png")
+    }
+PAGE = '''<!DOCTYPE html>
+<html>
+<head><title>{title}</title></head>
+<body style="margin: 0; background: #000000">
+<img src="/stream" style="display: block; margin: auto; max-width: 100vw; \
+max-height: 100vh">
+</body>
+</html>
+'''
+
+
+def encode(surface, imageFormat="jpeg"):
+    '''A pygame surface as the bytes of an imageFormat image.'''
+    import pygame
+    buf = io.BytesIO()
+    pygame.image.save(surface, buf, FORMATS[imageFormat][1])
+    return buf.getvalue()
+
+
+class Client:
+    '''One viewer's mailbox. It only ever holds the newest frame that
+hasn't been sent yet, so a new frame replaces one the viewer didn't get
+to, which counts as dropped.'''
+
+    def __init__(self):
+        self.frame = None
+        self.sent = 0
+        self.dropped = 0
+        self.closed = False
+        self._ready = asyncio.Event()
+
+    def offer(self, frame):
+        if self.frame is not None:
+            self.dropped += 1
+        self.frame = frame
+        self._ready.set()
+
+    def close(self):
+        self.closed = True
+        self._ready.set()
+
+    async def next(self):
+        '''Wait for a frame. Returns None once the client is closed.'''
+        await self._ready.wait()
+        self._ready.clear()
+        if self.closed:
+            return None
+        frame, self.frame = self.frame, None
+        return frame
+
+
+class FrameServer:
+    '''Serves encoded frames over HTTP on an event loop of its own thread.
+publish can be called from any thread. A viewer whose connection doesn't
+take a frame within clientTimeout seconds is disconnected.'''
+
+    def __init__(self, imageFormat="jpeg", title="RoboRadar",
+                 maxClients=16, clientTimeout=10):
+        self.contentType = FORMATS[imageFormat][0]
+        self.title = title
+        self.maxClients = maxClients
+        self.clientTimeout = clientTimeout
+        self.clients = set()
+        self._wanted = threading.Event()
+        self._loop = None
+        self._server = None
+
+    def start(self, host="0.0.0.0", port=PORT):
+        '''Start the server's event loop thread and accept viewers on host
+and port. Returns the address viewers can reach, which tells what port 0
+turned into.'''
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(
+            target=self._loop.run_forever,
+            name="RoboRadar server",
+            daemon=True
+            ).start()
+        self._server = asyncio.run_coroutine_threadsafe(
+            asyncio.start_server(self._handle, host, port),
+            self._loop
+            ).result()
+        return self._server.sockets[0].getsockname()[:2]
+
+    def close(self):
+        if self._server is None:
+            return
+
+        async def close():
+            self._server.close()
+            for client in list(self.clients):
+                client.close()
+            await self._server.wait_closed()
+
+        asyncio.run_coroutine_threadsafe(close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._server = None
+
+    def watched(self):
+        '''True while anyone is connected.'''
+        return bool(self.clients)
+
+    def wanted(self):
+        '''True once after a viewer connected, which needs a frame even if
+nothing changed.'''
+        if self._wanted.is_set():
+            self._wanted.clear()
+            return True
+        return False
+
+    def publish(self, data):
+        '''Send the encoded frame data to every viewer.'''
+        self._loop.call_soon_threadsafe(self._publish, data)
+
+    def _publish(self, data):
+        for client in self.clients:
+            client.offer(data)
+
+    async def _handle(self, reader, writer):
+        try:
+            request = await asyncio.wait_for(
+                reader.readuntil(b"\r\n\r\n"),
+                self.clientTimeout
+                )
+            method, path = request.split(b" ", 2)[:2]
+            path = path.split(b"?", 1)[0]
+            if method != b"GET":
+                await self._respond(writer, b"405 Method Not Allowed")
+            elif path == b"/":
+                await self._respond(
+                    writer,
+                    b"200 OK",
+                    b"text/html; charset=utf-8",
+                    PAGE.format(title=self.title).encode()
+                    )
+            elif path not in (b"/stream", b"/frame"):
+                await self._respond(writer, b"404 Not Found")
+            elif len(self.clients) >= self.maxClients:
+                await self._respond(writer, b"503 Service Unavailable")
+            else:
+                await self._watch(reader, writer, path == b"/stream")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+                asyncio.TimeoutError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, contentType=b"text/plain",
+                       body=None):
+        if body is None:
+            body = status + b"\r\n"
+        writer.write(
+            b"HTTP/1.1 " + status + b"\r\n"
+            b"Content-Type: " + contentType + b"\r\n"
+            b"Content-Length: " + str(len(body)).encode() + b"\r\n"
+            b"Cache-Control: no-store\r\n"
+            b"Connection: close\r\n\r\n" + body
+            )
+        await asyncio.wait_for(writer.drain(), self.clientTimeout)
+
+    async def _hangup(self, reader, client):
+        '''Close client once the viewer hangs up, which would otherwise go
+unnoticed until the next frame.'''
+        try:
+            while await reader.read(1024):
+                pass
+        except ConnectionError:
+            pass
+        client.close()
+
+    async def _watch(self, reader, writer, stream):
+        '''Send frames until the viewer goes away, or just one.'''
+        client = Client()
+        self.clients.add(client)
+        self._wanted.set()
+        hangup = asyncio.ensure_future(self._hangup(reader, client))
+        contentType = self.contentType.encode()
+        try:
+            if stream:
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\n"
+                    b"Content-Type: multipart/x-mixed-replace; boundary="
+                    + BOUNDARY + b"\r\n"
+                    b"Cache-Control: no-store\r\n"
+                    b"Connection: close\r\n\r\n"
+                    )
+            while True:
+                frame = await client.next()
+                if frame is None:
+                    return
+                if not stream:
+                    await self._respond(writer, b"200 OK", contentType, frame)
+                    return
+                writer.write(
+                    b"--" + BOUNDARY + b"\r\n"
+                    b"Content-Type: " + contentType + b"\r\n"
+                    b"Content-Length: " + str(len(frame)).encode()
+                    + b"\r\n\r\n" + frame + b"\r\n"
+                    )
+                # Frames that arrive while this waits replace each other in
+                # the mailbox, that is what keeps slow viewers from piling
+                # them up.
+                await asyncio.wait_for(writer.drain(), self.clientTimeout)
+                client.sent += 1
+        finally:
+            hangup.cancel()
+            self.clients.discard(client)
+
+
+def serve(host=None, port=None):
+    '''Render the configured field and robots without a window and stream
+them until interrupted.'''
+    conf = roboradar.conf
+    serverConf = conf.get("SERVER", {})
+    if host is None:
+        host = serverConf.get("HOST", "0.0.0.0")
+    if port is None:
+        port = serverConf.get("PORT", PORT)
+    imageFormat = serverConf.get("FORMAT", "jpeg")
+    # No window, but pygame still draws.
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    pygame.init()
+
+    r = roboradar.Radar(
+        conf["VIDEO"]["SCREEN_DIMENSIONS"],
+        "pygame",
+        dirtyRects=False
+        )
+    r.loadField(conf["FIELD"]["NAME"])
+    for i in range(conf["ROBOT"].get("COUNT", 1)):
+        r.add_ds(roboradar.robotList[
+            conf["ROBOT"]["NAME"] or "BoxBot"
+            ](index=i))
+
+    server = FrameServer(
+        imageFormat,
+        "RoboRadar v{} - Team {}".format(
+            roboradar.VERSION,
+            conf["TEAM"]["NUMBER"]
+            ),
+        serverConf.get("MAX_CLIENTS", 16),
+        serverConf.get("CLIENT_TIMEOUT", 10)
+        )
+    bound = server.start(host, port)
+    print("Serving RoboRadar on http://{}:{}/".format(*bound))
+    clock = pygame.time.Clock()
+    try:
+        while True:
+            # SDL turns SIGTERM into a QUIT event.
+            if pygame.event.peek(pygame.QUIT):
+                return
+            pygame.event.clear()
+            if server.wanted():
+                r.invalidate()
+            # Profiling startup needs a first frame, viewers or not.
+            watched = server.watched() or roboradar.startup.profiling
+            if watched and r.needsRender():
+                frameStart = time.perf_counter()
+                server.publish(encode(r.pygame_render(), imageFormat))
+                r.presented()
+                if roboradar.startup.first_frame(frameStart):
+                    return
+            clock.tick(conf["VIDEO"]["FPS"])
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        pygame.quit()
@@ -0,0 +1,136 @@
+'''Compact shape records for the render pipeline.
+
+Fields and robots describe shapes as PSF1 dicts, which are easy to write
+but slow to look through every frame. A Shape holds the same information in
+__slots__, with everything the renderers check resolved once: the type as
+an integer code, the style as a bitmask, the color both as a tuple and
+packed into one int, and the points as an (n, 2) float64 array.
+from_dict converts the dict format; to_shape takes either.'''
+
+import functools
+
+import numpy as np
+
+# Type codes. Anything else is UNKNOWN, which the renderers skip.
+UNKNOWN = 0
+POLYGON = 1
+LINE = 2
+TYPES = {
+    "polygon": POLYGON,
+    "line": LINE
+    }
+
+# Style bits.
+FILLED = 1
+OUTLINE = 2
+AA = 4
+STYLES = {
+    "filled": FILLED,
+    "outline": OUTLINE,
+    "aa": AA
+    }
+
+
+def style_mask(style):
+    '''Style names to a bitmask. Styles are written as tuples, but
+("outline") is just a string, so a string is one style name.'''
+    if isinstance(style, str):
+        style = (style,)
+    mask = 0
+    for name in style:
+        mask |= STYLES.get(name, 0)
+    return mask
+
+
+def pack_rgb(color):
+    return color[0] << 16 | color[1] << 8 | color[2]
+
+
+@functools.lru_cache(maxsize=256)
+def color_hex(color):
+    return "#{0:02x}{1:02x}{2:02x}".format(*color)
+
+
+class Shape:
+    '''One polygon or line. points is None for a shape that only carries
+a style, like the ones in a geometry.Template. local is False for shapes
+that aren't in their DynamicShape's coordinate space, and unit is the
+shape's own unit, if it has one.'''
+
+    __slots__ = (
+        "name",
+        "kind",
+        "style",
+        "color",
+        "rgb",
+        "hex",
+        "layer",
+        "local",
+        "unit",
+        "points"
+        )
+
+    def __init__(self, name, kind, style=0, color=(0, 0, 0), points=None,
+                 layer=0, local=True, unit=None):
+        self.name = name
+        self.kind = kind
+        self.style = style
+        self.color = tuple(map(int, color))
+        self.rgb = pack_rgb(self.color)
+        self.hex = color_hex(self.color)
+        self.layer = layer
+        self.local = local
+        self.unit = unit
+        if points is not None:
+            points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        self.points = points
+
+    def __repr__(self):
+        return "Shape({!r}, {}, style={}, color={}, points={})".format(
+            self.name,
+            self.kind,
+            self.style,
+            self.color,
+            None if self.points is None else len(self.points)
+            )
+
+    def withPoints(self, points):
+        '''A copy of this shape with other points, which have to be an
+(n, 2) float64 array already.'''
+        copy = Shape.__new__(Shape)
+        for slot in Shape.__slots__:
+            setattr(copy, slot, getattr(self, slot))
+        copy.points = points
+        return copy
+
+    def sameStyle(self, other):
+        '''Compare everything but the points.'''
+        return self.name == other.name \
+            and self.kind == other.kind \
+            and self.rgb == other.rgb \
+            and self.style == other.style
+
+
+def from_dict(shape, scale=None):
+    '''Convert a PSF1 shape dict. If scale is given, the points are
+multiplied by it.'''
+    converted = Shape(
+        shape["name"],
+        TYPES.get(shape["type"], UNKNOWN),
+        style_mask(shape.get("style", ())),
+        shape["color"],
+        shape.get("points", None),
+        shape.get("layer", 0),
+        shape.get("coordinate-space", "local") == "local",
+        shape.get("unit", None)
+        )
+    if scale is not None and converted.points is not None:
+        converted.points = converted.points * scale
+    return converted
+
+
+def to_shape(shape):
+    '''Return shape if it is a Shape already, otherwise convert it.'''
+    if isinstance(shape, Shape):
+        return shape
+    return from_dict(shape)
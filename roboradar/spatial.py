@@ -0,0 +1,105 @@
+'''Finding the shapes inside a view without looking at all of them.
+
+Static shapes are put in a uniform grid over the field, by bounding box, so
+a zoomed in camera only has to convert and draw the shapes in the cells it
+can see.'''
+
+import math
+
+import numpy as np
+
+GRID_CELLS = 32
+
+
+def bounds(points):
+    '''(min x, min y, max x, max y) of an (n, 2) array.'''
+    lo = points.min(axis=0)
+    hi = points.max(axis=0)
+    return (float(lo[0]), float(lo[1]), float(hi[0]), float(hi[1]))
+
+
+class GridIndex:
+    '''Items by bounding box, in a grid of cellSize squares. Boxes are
+(min x, min y, max x, max y).'''
+
+    def __init__(self, cellSize):
+        self.cellSize = cellSize
+        self._cells = {}
+        self._boxes = {}
+
+    def __len__(self):
+        return len(self._boxes)
+
+    def _range(self, box):
+        s = self.cellSize
+        return (
+            range(math.floor(box[0] / s), math.floor(box[2] / s) + 1),
+            range(math.floor(box[1] / s), math.floor(box[3] / s) + 1)
+            )
+
+    def insert(self, item, box):
+        xs, ys = self._range(box)
+        for x in xs:
+            for y in ys:
+                self._cells.setdefault((x, y), []).append(item)
+        self._boxes[item] = box
+
+    def query(self, box):
+        '''The set of items whose boxes overlap box.'''
+        xs, ys = self._range(box)
+        found = set()
+        if len(xs) * len(ys) > len(self._cells):
+            # Bigger than the grid, walk the cells instead.
+            for (x, y), items in self._cells.items():
+                if x in xs and y in ys:
+                    found.update(items)
+        else:
+            for x in xs:
+                for y in ys:
+                    found.update(self._cells.get((x, y), ()))
+        return {
+            item for item in found
+            if _overlap(self._boxes[item], box)
+            }
+
+
+def _overlap(a, b):
+    return a[0] <= b[2] and a[2] >= b[0] and a[1] <= b[3] and a[3] >= b[1]
+
+
+def static_index(field):
+    '''The GridIndex of a compiled field's static shapes, by position in
+field["static-shapes"]. Built once per field and kept in it.'''
+    index = field.get("static-index", None)
+    if index is None:
+        index = GridIndex(max(field["width"], field["height"]) / GRID_CELLS)
+        for i, shape in enumerate(field["static-shapes"]):
+            if len(shape.points):
+                index.insert(i, bounds(shape.points))
+        field["static-index"] = index
+    return index
+
+
+def shape_bounds(vertices, offsets):
+    '''(n, 4) array with the bounding box of every shape, where shape i
+owns vertices[offsets[i]:offsets[i + 1]]. Shapes without points get an
+empty box that overlaps nothing.'''
+    n = len(offsets) - 1
+    boxes = np.empty((n, 4))
+    boxes[:, :2] = np.inf
+    boxes[:, 2:] = -np.inf
+    if not len(vertices):
+        return boxes
+    starts = np.asarray(offsets[:-1])
+    counts = np.diff(offsets)
+    nonempty = counts > 0
+    starts = starts[nonempty]
+    boxes[nonempty, :2] = np.minimum.reduceat(vertices, starts)
+    boxes[nonempty, 2:] = np.maximum.reduceat(vertices, starts)
+    return boxes
+
+
+def visible(boxes, view):
+    '''Boolean mask of the boxes that overlap the box view.'''
+    return (boxes[:, 0] <= view[2]) & (boxes[:, 2] >= view[0]) \
+        & (boxes[:, 1] <= view[3]) & (boxes[:, 3] >= view[1])
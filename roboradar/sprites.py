@@ -0,0 +1,143 @@
+'''Pre-rasterized robot sprites for the pygame engine.
+
+A robot only looks different when its template (size, color, units), the
+window scale or the style settings change, so instead of filling its
+polygons every frame it is rasterized once per angle on screen and
+blitted. Angles, the robot's heading plus any camera rotation, are rounded
+to angleStep degrees, and the screen's x and y scales are treated as
+equal.
+
+With antialiasing, sprites are drawn SUPERSAMPLE times larger and scaled
+down, which smooths every edge instead of outlining polygons with
+antialiased lines. Sprites have premultiplied alpha, so blit them with
+pygame.BLEND_PREMULTIPLIED.'''
+
+import math
+
+import numpy as np
+
+try:
+    from roboradar import cache
+    from roboradar.shape_record import AA, FILLED, LINE, OUTLINE, POLYGON
+except ImportError:
+    import cache
+    from shape_record import AA, FILLED, LINE, OUTLINE, POLYGON
+
+SUPERSAMPLE = 4
+
+
+class SpriteCache:
+    '''The last maxsize sprites, keyed by (template key, angle step,
+scale, mirrored, pose scale, filled polygons, antialiasing).'''
+
+    def __init__(self, angleStep=1, maxsize=2048):
+        self.steps = max(1, round(360 / angleStep))
+        self.rasterized = 0
+        self._sprites = cache.LRUCache(maxsize)
+
+    def __len__(self):
+        return len(self._sprites)
+
+    def clear(self):
+        self._sprites.clear()
+
+    def get(self, template, pose, screen, filledPolygons, antialiasing):
+        '''Return (sprite, corner) for a geometry.Template placed with pose
+(see DynamicShape.getMatrix) on a screen with the 3x3 transform screen.
+corner is where the sprite's top left goes, relative to the screen position
+of the template's origin.'''
+        (cos, _, _), (sin, _, _), _ = pose.tolist()
+        poseScale = math.hypot(cos, sin)
+        (a, b, _), (c, d, _), _ = screen.tolist()
+        # Local points to screen pixels, taken apart into a uniform scale,
+        # an angle and whether it mirrors (screen y points down, so it
+        # usually does). The robot's heading and a rotated camera both end
+        # up in the angle, so neither makes new keys for every frame.
+        m00 = a * cos + b * sin
+        m01 = b * cos - a * sin
+        m10 = c * cos + d * sin
+        m11 = d * cos - c * sin
+        mirrored = m00 * m11 - m01 * m10 < 0
+        if mirrored:
+            p, q = (m00 - m11) / 2, (m01 + m10) / 2
+        else:
+            p, q = (m00 + m11) / 2, (m10 - m01) / 2
+        scale = math.hypot(p, q)
+        step = round(math.atan2(q, p) / (2 * math.pi) * self.steps) \
+            % self.steps
+        # Rounded so float noise doesn't make new keys.
+        key = (
+            template.key,
+            step,
+            round(scale, 6),
+            mirrored,
+            round(poseScale, 9),
+            filledPolygons,
+            antialiasing
+            )
+        sprite = self._sprites.get(key, None)
+        if sprite is None:
+            angle = step * 2 * math.pi / self.steps
+            cos, sin = math.cos(angle) * scale, math.sin(angle) * scale
+            if mirrored:
+                matrix = np.array(((cos, sin), (sin, -cos)))
+            else:
+                matrix = np.array(((cos, -sin), (sin, cos)))
+            sprite = rasterize(
+                template,
+                matrix,
+                filledPolygons,
+                antialiasing,
+                poseScale
+                )
+            self._sprites.put(key, sprite)
+            self.rasterized += 1
+        return sprite
+
+
+def rasterize(template, matrix, filledPolygons, antialiasing, scale=1):
+    '''Draw a Template transformed by the 2x2 matrix, which takes local
+points to screen pixels for a pose that scales by scale. Returns (sprite,
+corner) like SpriteCache.get.'''
+    import pygame
+    p = template.localPoints(scale) @ matrix.T
+    # A pixel of room on each side for lines and rounding.
+    lo = np.floor(p.min(axis=0)) - 1
+    hi = np.ceil(p.max(axis=0)) + 1
+    size = (int(hi[0] - lo[0]), int(hi[1] - lo[1]))
+    k = SUPERSAMPLE if antialiasing else 1
+    # New SRCALPHA surfaces are transparent black, which is already
+    # premultiplied, and pygame.draw replaces pixels instead of blending.
+    surface = pygame.Surface((size[0] * k, size[1] * k), pygame.SRCALPHA)
+    p = ((p - lo) * k).tolist()
+    start = 0
+    for shape, count in zip(template.shapes, template.counts):
+        _draw(
+            surface,
+            shape,
+            p[start:start + count],
+            k,
+            filledPolygons,
+            antialiasing
+            )
+        start += count
+    if k > 1:
+        surface = pygame.transform.smoothscale(surface, size)
+    return surface, (int(lo[0]), int(lo[1]))
+
+
+def _draw(surface, shape, points, width, filledPolygons, antialiasing):
+    '''Like Radar._pygame_raster, with lines width pixels wide.'''
+    import pygame
+    if shape.kind == POLYGON:
+        fill = shape.style & FILLED and filledPolygons
+        if fill:
+            pygame.draw.polygon(surface, shape.color, points)
+        # Supersampling already smoothed the edges of filled polygons.
+        if shape.style & OUTLINE \
+                or shape.style & FILLED and not filledPolygons \
+                or shape.style & AA and antialiasing and not fill:
+            pygame.draw.polygon(surface, shape.color, points, width)
+    elif shape.kind == LINE:
+        if shape.style & OUTLINE or shape.style & AA and antialiasing:
+            pygame.draw.lines(surface, shape.color, False, points, width)
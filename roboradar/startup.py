@@ -0,0 +1,101 @@
+'''Timing of the startup phases, reported by
+py -m roboradar --profile-startup
+
+Timing is always on since it is only a couple of perf_counter calls per
+phase. Only the first run of each phase is recorded, so later field loads
+and such don't overwrite the startup numbers.'''
+
+import collections
+import json
+import time
+
+_origin = time.perf_counter()
+_firstFrameDone = False
+
+# name -> (start, duration), in seconds since the roboradar import started
+phases = collections.OrderedDict()
+profiling = False
+
+
+class phase:
+    '''Context manager that times a startup phase.'''
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.name not in phases:
+            phases[self.name] = (
+                self.start - _origin,
+                time.perf_counter() - self.start
+                )
+
+
+def first_frame(start):
+    '''Call after a frame has been shown, with the perf_counter() from when
+it started. Returns True when profiling and the first frame is done, which
+means the app should exit.'''
+    global _firstFrameDone
+    if _firstFrameDone:
+        return False
+    _firstFrameDone = True
+    phases["first frame"] = (start - _origin, time.perf_counter() - start)
+    return profiling
+
+
+def time_to_first_frame():
+    if "first frame" not in phases:
+        return None
+    start, duration = phases["first frame"]
+    return start + duration
+
+
+def report():
+    ttff = time_to_first_frame()
+    return {
+        "phases": [
+            {
+                "name": name,
+                "start_ms": start * 1000,
+                "duration_ms": duration * 1000
+                }
+            for name, (start, duration) in sorted(
+                phases.items(),
+                key=lambda item: item[1][0]
+                )
+            ],
+        "time_to_first_frame_ms": None if ttff is None else ttff * 1000
+        }
+
+
+def format_report(data=None):
+    if data is None:
+        data = report()
+    lines = ["{:>10}  {:>10}  {}".format("start ms", "took ms", "phase")]
+    for p in data["phases"]:
+        lines.append("{:10.1f}  {:10.1f}  {}".format(
+            p["start_ms"],
+            p["duration_ms"],
+            p["name"]
+            ))
+    if data["time_to_first_frame_ms"] is not None:
+        lines.append("time to first frame: {:.1f} ms".format(
+            data["time_to_first_frame_ms"]
+            ))
+    return "\n".join(lines)
+
+
+def dump(path=None):
+    '''Print the report, and write it as JSON to path, or print the JSON too
+if path is None.'''
+    data = report()
+    print(format_report(data))
+    if path is None:
+        print(json.dumps(data))
+    else:
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
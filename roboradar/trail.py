@@ -0,0 +1,74 @@
+'''Trails showing where robots have been.
+
+Positions are kept in a fixed size ring buffer per robot, so a trail costs
+the same after hours of practice as it does after a minute.'''
+
+import numpy as np
+
+
+class Trail:
+    '''The last seconds of positions of one shape, in field meters.
+Holds at most capacity points, older ones are overwritten.'''
+
+    def __init__(self, seconds, capacity):
+        self.seconds = seconds
+        self._points = np.empty((capacity, 3))
+        self._head = 0
+        self._count = 0
+        self._last = None
+
+    def __len__(self):
+        return self._count
+
+    def push(self, t, x, y):
+        '''Add a position. Nothing is added while standing still, even
+once the trail has expired.'''
+        capacity = len(self._points)
+        if self._last == (x, y):
+            return False
+        self._last = (x, y)
+        self._points[self._head] = (t, x, y)
+        self._head = (self._head + 1) % capacity
+        self._count = min(self._count + 1, capacity)
+        return True
+
+    def last(self):
+        '''The newest (x, y), or None if empty.'''
+        if not self._count:
+            return None
+        return self._points[(self._head - 1) % len(self._points), 1:]
+
+    def points(self, now):
+        '''(n, 2) array of the positions from the last seconds before now,
+oldest first.'''
+        capacity = len(self._points)
+        index = np.arange(self._head - self._count, self._head) % capacity
+        points = self._points[index]
+        return points[points[:, 0] >= now - self.seconds, 1:]
+
+    def expire(self, now):
+        '''Drop the positions from before the last seconds before now.
+Returns True if there were any.'''
+        capacity = len(self._points)
+        index = np.arange(self._head - self._count, self._head) % capacity
+        old = np.count_nonzero(self._points[index, 0] < now - self.seconds)
+        self._count -= old
+        return old > 0
+
+    def clear(self):
+        self._head = 0
+        self._count = 0
+        self._last = None
+
+
+def decimate(points):
+    '''Truncate screen points to pixels like the renderers do, dropping
+every point that lands on the same pixel as the one before it. Returns an
+int32 array.'''
+    p = np.asarray(points).astype(np.int32)
+    if len(p) < 2:
+        return p
+    keep = np.empty(len(p), dtype=bool)
+    keep[0] = True
+    keep[1:] = (p[1:] != p[:-1]).any(axis=1)
+    return p[keep]
@@ -0,0 +1,212 @@
+'''Robot poses over UDP, a lower latency alternative to NetworkTables.
+
+Each datagram is one whole pose, so nothing is batched and a pose can't
+arrive half updated. A datagram is HEADER:
+    magic b"RR", format version, flags, sequence number (uint32),
+    timestamp (float64 seconds on the sender's clock),
+    x, y (float32 meters), r (float32 radians)
+followed by the optional fields that flags has bits for, in this order:
+    FLAG_SIZE: w, h (float32 meters)
+    FLAG_COLOR: red, green, blue (uint8)
+All little endian. Run py -m roboradar.udp to send test poses.'''
+
+import argparse
+import asyncio
+import math
+import socket
+import struct
+import threading
+import time
+
+MAGIC = b"RR"
+FORMAT_VERSION = 1
+# FRC allows teams to use ports 5800 to 5810 on the field network.
+PORT = 5810
+HEADER = struct.Struct("<2sBBIdfff")
+SIZE = struct.Struct("<ff")
+COLOR = struct.Struct("<3B")
+FLAG_SIZE = 1
+FLAG_COLOR = 2
+
+
+def pack(sequence, timestamp, x, y, r, size=None, color=None):
+    flags = 0
+    extra = b""
+    if size is not None:
+        flags |= FLAG_SIZE
+        extra += SIZE.pack(*size)
+    if color is not None:
+        flags |= FLAG_COLOR
+        extra += COLOR.pack(*color)
+    return HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        flags,
+        sequence & 0xFFFFFFFF,
+        timestamp,
+        x,
+        y,
+        r
+        ) + extra
+
+
+def unpack(data):
+    '''Return (sequence, timestamp, fields), where fields is a dict of Pose
+fields, or None if data isn't a pose datagram.'''
+    if len(data) < HEADER.size:
+        return None
+    magic, version, flags, sequence, timestamp, x, y, r = \
+        HEADER.unpack_from(data)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        return None
+    fields = {"x": x, "y": y, "r": r}
+    offset = HEADER.size
+    try:
+        if flags & FLAG_SIZE:
+            fields["w"], fields["h"] = SIZE.unpack_from(data, offset)
+            offset += SIZE.size
+        if flags & FLAG_COLOR:
+            fields["color"] = COLOR.unpack_from(data, offset)
+            offset += COLOR.size
+    except struct.error:
+        return None
+    return sequence, timestamp, fields
+
+
+def newer(a, b):
+    '''True if sequence number a comes after b, allowing for wraparound.'''
+    return 0 < (a - b) % 2**32 < 2**31
+
+
+class PoseProtocol(asyncio.DatagramProtocol):
+    '''Passes (timestamp, fields) of every valid datagram to callback,
+with timestamp converted to this machine's time.monotonic().
+Datagrams that arrive after a newer one, or are repeated, are dropped.
+After resetAfter seconds without any, every sequence number is accepted
+again, in case the sender restarted.'''
+
+    def __init__(self, callback, resetAfter=1):
+        self.callback = callback
+        self.resetAfter = resetAfter
+        self.dropped = 0
+        self._last = None
+        self._lastTime = None
+        self._offset = None
+
+    def datagram_received(self, data, addr):
+        packet = unpack(data)
+        if packet is None:
+            self.dropped += 1
+            return
+        sequence, timestamp, fields = packet
+        now = time.monotonic()
+        if self._last is not None and now - self._lastTime < self.resetAfter:
+            if not newer(sequence, self._last):
+                self.dropped += 1
+                return
+        else:
+            self._offset = None
+        self._last = sequence
+        self._lastTime = now
+        # The sender's clock is mapped onto ours with the smallest delay
+        # seen, so network jitter doesn't end up in the timestamps.
+        offset = now - timestamp
+        if self._offset is None or offset < self._offset:
+            self._offset = offset
+        self.callback(min(timestamp + self._offset, now), fields)
+
+
+_loop = None
+_loopLock = threading.Lock()
+
+
+def get_loop():
+    '''The asyncio event loop every Receiver shares, running on its own
+thread.'''
+    global _loop
+    with _loopLock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_loop.run_forever,
+                name="RoboRadar UDP",
+                daemon=True
+                ).start()
+    return _loop
+
+
+class Receiver:
+    '''Receives pose datagrams on the shared event loop.'''
+
+    def __init__(self, callback):
+        self.callback = callback
+        self.protocol = None
+        self._transport = None
+
+    def start(self, host="0.0.0.0", port=PORT):
+        '''Start listening. Returns the (host, port) actually bound, port 0
+picks a free one.'''
+        self._transport, self.protocol = asyncio.run_coroutine_threadsafe(
+            get_loop().create_datagram_endpoint(
+                lambda: PoseProtocol(self.callback),
+                local_addr=(host, port)
+                ),
+            get_loop()
+            ).result()
+        return self._transport.get_extra_info("sockname")[:2]
+
+    def close(self):
+        if self._transport is not None:
+            get_loop().call_soon_threadsafe(self._transport.close)
+            self._transport = None
+
+
+class Sender:
+    '''Sends poses, for use on a robot or as a stand-in for one.
+Senders for many robots can share one socket.'''
+
+    def __init__(self, host="127.0.0.1", port=PORT, sock=None):
+        self.address = (host, port)
+        self.sequence = 0
+        if sock is None:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket = sock
+
+    def send(self, x, y, r, size=None, color=None, timestamp=None):
+        if timestamp is None:
+            timestamp = time.monotonic()
+        self._socket.sendto(
+            pack(self.sequence, timestamp, x, y, r, size, color),
+            self.address
+            )
+        self.sequence += 1
+
+    def close(self):
+        self._socket.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Send a robot driving in circles to a UDPBoxBot."
+        )
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('-p', '--port', type=int, default=PORT)
+    parser.add_argument(
+        '-r', '--rate', type=float, default=50, help="poses per second")
+    options = parser.parse_args()
+    sender = Sender(options.host, options.port)
+    i = 0
+    while True:
+        sender.send(
+            1.5 * math.cos(i),
+            1.5 * math.sin(i),
+            i,
+            size=(0.6858, 0.8128),
+            color=(255, 0, 0)
+            )
+        time.sleep(1 / options.rate)
+        i += 1 / options.rate
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+'''Length unit conversion that keeps pint out of the startup and frame paths.
+
+The units robots actually send have their scale factors written out here.
+pint is only imported, and its registry only built, the first time some
+other unit string shows up. Either way each unit string is resolved once and
+cached, so converting is a dict lookup and a multiply.'''
+
+try:
+    from roboradar import startup
+except ImportError:
+    import startup
+
+BASE_UNITS = "meter"
+
+_scales = {
+    "meter": 1.0,
+    "meters": 1.0,
+    "metre": 1.0,
+    "metres": 1.0,
+    "m": 1.0,
+    "centimeter": 0.01,
+    "centimeters": 0.01,
+    "centimetre": 0.01,
+    "centimetres": 0.01,
+    "cm": 0.01,
+    "millimeter": 0.001,
+    "millimeters": 0.001,
+    "millimetre": 0.001,
+    "millimetres": 0.001,
+    "mm": 0.001,
+    "inch": 0.0254,
+    "inches": 0.0254,
+    "in": 0.0254,
+    "foot": 0.3048,
+    "feet": 0.3048,
+    "ft": 0.3048
+    }
+
+_registry = None
+
+
+def get_registry():
+    '''Return the shared pint UnitRegistry, creating it on first use.'''
+    global _registry
+    if _registry is None:
+        with startup.phase("pint registry"):
+            import pint
+            _registry = pint.UnitRegistry()
+    return _registry
+
+
+def scale(units):
+    '''Return the factor that converts a length in units to BASE_UNITS.'''
+    s = _scales.get(units, None)
+    if s is None:
+        s = get_registry().parse_expression(units).to(BASE_UNITS).magnitude
+        _scales[units] = s
+    return s
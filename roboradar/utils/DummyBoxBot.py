@@ -1,22 +1,9 @@
-import time
-import math
-from networktables import NetworkTables
+'''Kept for older instructions, use roboradar.utils.loadgen instead.
+Publishes one BoxBot driving in circles over NetworkTables.'''
 
-import logging
+try:
+    from roboradar.utils import loadgen
+except ImportError:
+    import loadgen
 
-logging.basicConfig(level=logging.DEBUG)
-
-NetworkTables.initialize()
-nt = NetworkTables.getTable("RoboRadar")
-
-i = 0
-while True:
-    nt.putNumber("posX", 60*math.cos(i))
-    nt.putNumber("posY", 60*math.sin(i))
-
-    nt.putNumber("posR", i)
-    nt.putNumber("posRSin", math.sin(i))
-    nt.putNumber("posRCos", math.cos(i))
-    nt.putNumber("posRTan", math.tan(i))
-    time.sleep(0.01)
-    i += 0.01
+loadgen.LoadGenerator(robots=1, transport="nt", rate=100).run()
@@ -0,0 +1,357 @@
+'''Headless rendering benchmarks.
+Run with py -m roboradar.utils.benchmark, see --help for the options.
+
+Radar is driven with synthetic robots (no NetworkTables). pygame uses SDL's
+dummy video driver and tkinter a withdrawn Tk root, so nothing is shown.
+Save the results with -o and compare later runs against them with -b.'''
+
+import argparse
+import itertools
+import json
+import math
+import os
+import platform
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import roboradar
+from roboradar.dynamic_shape import DynamicShape
+
+# A full set of alliances plus a field full of game pieces has to render at
+# this rate on a driver station laptop.
+SCALING_TARGET = {"robots": 6, "pieces": 300, "fps": 60}
+
+
+class SyntheticBot(DynamicShape):
+    '''A BoxBot lookalike that drives in circles, without NetworkTables.'''
+    units = "inch"
+
+    def __init__(self, number=0, templates=True, w=27, h=32):
+        self.number = number
+        self.templates = templates
+        self.w = w
+        self.h = h
+        self.color = ((255, 0, 0), (0, 0, 255))[number % 2]
+        self.step(0)
+
+    def step(self, t):
+        a = t + self.number
+        self.x = 100 * math.cos(a)
+        self.y = 200 * math.sin(a * 0.7)
+        self.r = a
+
+    def getTemplateKey(self):
+        if not self.templates:
+            return None
+        return ("SyntheticBot", self.w, self.h, self.color)
+
+    def getShapes(self):
+        w = self.w / 2
+        h = self.h / 2
+        return [
+            {
+                "name": "bumpers",
+                "type": "polygon",
+                "style": ("filled", "aa"),
+                "color": self.color,
+                "layer": 0,
+                "coordinate-space": "local",
+                "points": [
+                    (-(w+3.25), (h+3.25)),
+                    ((w+3.25), (h+3.25)),
+                    ((w+3.25), -(h+3.25)),
+                    (-(w+3.25), -(h+3.25))
+                    ]
+                },
+            {
+                "name": "frame",
+                "type": "polygon",
+                "style": ("filled", "aa"),
+                "color": (128, 128, 128),
+                "layer": 0,
+                "coordinate-space": "local",
+                "points": [(-w, h), (w, h), (w, -h), (-w, -h)]
+                },
+            {
+                "name": "arrow",
+                "type": "line",
+                "style": ("outline",),
+                "color": (0, 255, 0),
+                "layer": 0,
+                "coordinate-space": "local",
+                "points": [(0, 0), (0, (h+8))]
+                }
+            ]
+
+
+class SyntheticPiece(SyntheticBot):
+    '''A 7 inch ball rolling around the field.'''
+
+    def getTemplateKey(self):
+        if not self.templates:
+            return None
+        return ("SyntheticPiece",)
+
+    def step(self, t):
+        a = t * 0.3 + self.number * 2.39996
+        self.x = (self.number * 37 % 290 - 145) * math.cos(a * 0.1)
+        self.y = (self.number * 53 % 580 - 290) * math.sin(a * 0.1)
+        self.r = 0
+
+    def getShapes(self):
+        return [
+            {
+                "name": "ball",
+                "type": "polygon",
+                "style": ("filled",),
+                "color": (255, 255, 0),
+                "layer": 0,
+                "coordinate-space": "local",
+                "points": [
+                    (3.5 * math.cos(i * math.pi / 4),
+                     3.5 * math.sin(i * math.pi / 4))
+                    for i in range(8)
+                    ]
+                }
+            ]
+
+
+DEFAULT_ENGINES = ("pygame", "numpy", "tkinter")
+DEFAULT_ROBOTS = (1, 10, 100, 1000)
+DEFAULT_SIZES = ((480, 640), (1080, 1920))
+
+_tkRoot = None
+
+
+def make_radar(engine, dimensions, robots, pieces=0, templates=True,
+               **kwargs):
+    global _tkRoot
+    if roboradar.VideoEngines[engine] is roboradar.VideoEngines.tkinter:
+        if _tkRoot is None:
+            _tkRoot = roboradar.tkinter.Tk()
+            _tkRoot.withdraw()
+        kwargs["master"] = _tkRoot
+    r = roboradar.Radar(dimensions, engine, **kwargs)
+    r.loadField(roboradar.conf["FIELD"]["NAME"])
+    shapes = [SyntheticBot(i, templates) for i in range(robots)]
+    shapes += [SyntheticPiece(i, templates) for i in range(pieces)]
+    for ds in shapes:
+        r.add_ds(ds)
+    return r, shapes
+
+
+def render_function(r, engine):
+    if roboradar.VideoEngines[engine] is roboradar.VideoEngines.pygame:
+        return r.pygame_render
+    if roboradar.VideoEngines[engine] is roboradar.VideoEngines.tkinter:
+        def render():
+            r.tkinter_render()
+            _tkRoot.update_idletasks()
+        return render
+    return r.numpy_render
+
+
+def run(r, shapes, render, frames):
+    '''Render frames frames, moving everything each time. Returns the time
+of every frame in seconds.'''
+    times = []
+    for frame in range(frames):
+        t = frame / 60
+        for ds in shapes:
+            ds.step(t)
+        start = time.perf_counter()
+        render()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def percentile(times, p):
+    '''times has to be sorted.'''
+    return times[min(len(times) - 1, int(len(times) * p / 100))]
+
+
+def summarize(times):
+    times = sorted(times)
+    mean = sum(times) / len(times)
+    return {
+        "frames": len(times),
+        "fps": 1 / mean,
+        "mean_ms": mean * 1000,
+        "p50_ms": percentile(times, 50) * 1000,
+        "p90_ms": percentile(times, 90) * 1000,
+        "p99_ms": percentile(times, 99) * 1000,
+        "max_ms": times[-1] * 1000
+        }
+
+
+def suite(engines=DEFAULT_ENGINES, robots=DEFAULT_ROBOTS,
+          sizes=DEFAULT_SIZES, frames=60, progress=None):
+    '''Benchmark every combination of engine, robot count, window size,
+antialiasing and filled polygons. Engines that can't start (no tkinter
+display, pygame not installed) get an entry with an "error" instead.'''
+    results = []
+    for engine in engines:
+        for count, size, aa, filled in itertools.product(
+                robots, sizes, (True, False), (True, False)):
+            case = {
+                "engine": engine,
+                "robots": count,
+                "size": list(size),
+                "antialiasing": aa,
+                "filled_polygons": filled
+                }
+            try:
+                r, shapes = make_radar(
+                    engine,
+                    size,
+                    count,
+                    antialiasing=aa,
+                    filledPolygons=filled
+                    )
+            except Exception as e:
+                case["error"] = "{}: {}".format(type(e).__name__, e)
+                results.append(case)
+                if progress is not None:
+                    progress(case)
+                break
+            render = render_function(r, engine)
+            # One untimed frame so first-use costs don't skew the numbers.
+            render()
+            case.update(summarize(run(r, shapes, render, frames)))
+            results.append(case)
+            if progress is not None:
+                progress(case)
+    return {
+        "roboradar": roboradar.VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "field": roboradar.conf["FIELD"]["NAME"],
+        "frames": frames,
+        "results": results
+        }
+
+
+def case_key(case):
+    return (
+        case["engine"],
+        case["robots"],
+        tuple(case["size"]),
+        case["antialiasing"],
+        case["filled_polygons"]
+        )
+
+
+def compare(results, baseline):
+    '''Yield (case, baseline case) for every case that ran in both.'''
+    old = {case_key(case): case for case in baseline["results"]}
+    for case in results["results"]:
+        base = old.get(case_key(case), None)
+        if base is not None and "error" not in case and "error" not in base:
+            yield case, base
+
+
+def format_case(case):
+    return "{:>8} {:>5} robots {:>9} aa={:d} filled={:d}".format(
+        case["engine"],
+        case["robots"],
+        "{}x{}".format(*case["size"]),
+        case["antialiasing"],
+        case["filled_polygons"]
+        )
+
+
+def print_case(case):
+    if "error" in case:
+        print("{}  skipped, {}".format(format_case(case), case["error"]))
+        return
+    print("{}  {:8.1f} fps  p50 {:7.2f} ms  p99 {:7.2f} ms".format(
+        format_case(case),
+        case["fps"],
+        case["p50_ms"],
+        case["p99_ms"]
+        ))
+
+
+def scaling(engine="pygame", dimensions=(480, 640), frames=120):
+    '''Compare templates against per-frame shape dicts at SCALING_TARGET.'''
+    results = {"target": SCALING_TARGET, "engine": engine}
+    for templates in (False, True):
+        r, shapes = make_radar(
+            engine,
+            dimensions,
+            SCALING_TARGET["robots"],
+            SCALING_TARGET["pieces"],
+            templates
+            )
+        geometryTimes = run(r, shapes, r._computeDynamic, frames)
+        renderTimes = run(r, shapes, render_function(r, engine), frames)
+        results["templates" if templates else "dicts"] = {
+            "geometry": summarize(geometryTimes),
+            "render": summarize(renderTimes),
+            "meets_target":
+                summarize(renderTimes)["fps"] >= SCALING_TARGET["fps"]
+            }
+    return results
+
+
+def size(text):
+    w, h = text.lower().split("x")
+    return (int(w), int(h))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '-e', '--engines', nargs="+", default=list(DEFAULT_ENGINES))
+    parser.add_argument(
+        '-r', '--robots', nargs="+", type=int, default=list(DEFAULT_ROBOTS))
+    parser.add_argument(
+        '-s', '--sizes', nargs="+", type=size, default=list(DEFAULT_SIZES),
+        help="window sizes as WIDTHxHEIGHT")
+    parser.add_argument('-f', '--frames', type=int, default=60)
+    parser.add_argument('-o', '--output', help="save the results as JSON")
+    parser.add_argument(
+        '-b', '--baseline', help="compare against earlier saved results")
+    parser.add_argument(
+        '--scaling', action='store_true',
+        help="only check SCALING_TARGET, templates against shape dicts")
+    options = parser.parse_args()
+    if options.scaling:
+        results = scaling(options.engines[0], frames=options.frames)
+        for name in ("dicts", "templates"):
+            print("{:>9}: geometry {:7.2f} ms, render {:7.2f} ms, "
+                  "{:6.1f} fps{}".format(
+                      name,
+                      results[name]["geometry"]["mean_ms"],
+                      results[name]["render"]["mean_ms"],
+                      results[name]["render"]["fps"],
+                      "" if results[name]["meets_target"]
+                      else " (below target)"
+                      ))
+    else:
+        results = suite(
+            options.engines,
+            options.robots,
+            options.sizes,
+            options.frames,
+            print_case
+            )
+        if options.baseline is not None:
+            with open(options.baseline) as f:
+                baseline = json.load(f)
+            print("\nmean frame time against {}:".format(options.baseline))
+            for case, base in compare(results, baseline):
+                print("{}  {:7.2f} ms -> {:7.2f} ms  ({:+.1f}%)".format(
+                    format_case(case),
+                    base["mean_ms"],
+                    case["mean_ms"],
+                    (case["mean_ms"] / base["mean_ms"] - 1) * 100
+                    ))
+    if options.output is not None:
+        with open(options.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+'''Simulated robots and game pieces, for putting a radar under load.
+Run with py -m roboradar.utils.loadgen, see --help for the options.
+
+Every simulated robot or game piece is published like a real robot, over
+UDP (to UDPBoxBot) or NetworkTables (to BoxBot). Number i goes to
+ROBOT.UDP_PORT + i or to table RoboRadar<i>, so start the radar with
+ROBOT.COUNT set to robots + pieces. Once a second the rate that was actually
+achieved is printed, so you can tell whether the generator or the radar is
+the one falling behind.
+
+With NetworkTables the generator is the server, and a process can only be
+one NetworkTables node, so run it in a different process from the radar
+(the default, or LoadGenerator.spawn()).'''
+
+import argparse
+import functools
+import math
+import multiprocessing
+import random
+import socket
+import threading
+import time
+
+try:
+    from roboradar import udp
+except ImportError:
+    import udp
+
+ROBOT_SIZE = (0.6858, 0.8128)
+PIECE_SIZE = (0.1778, 0.1778)
+ALLIANCES = ((255, 0, 0), (0, 0, 255))
+PIECE_COLOR = (255, 255, 0)
+
+
+# Motion models, (number, t) -> (x, y, r) in meters and radians. They only
+# depend on t, so no state has to be kept per robot.
+def static(number, t):
+    return (
+        (number * 0.37 % 6) - 3,
+        (number * 0.53 % 12) - 6,
+        0.0
+        )
+
+
+def circle(number, t):
+    radius = 1 + number * 0.25 % 2.5
+    a = t * 1.5 / radius + number
+    return radius * math.cos(a), radius * math.sin(a), a + math.pi / 2
+
+
+def lissajous(number, t):
+    a = t * 0.5 + number * 2.39996
+    return 3 * math.sin(a * 1.3), 6 * math.sin(a * 0.7), a
+
+
+@functools.lru_cache(maxsize=None)
+def _wanderWaves(number):
+    rng = random.Random(number)
+    return [
+        (amplitude, rng.uniform(0.2, 1), rng.uniform(0, 6),
+         rng.uniform(0.2, 1), rng.uniform(0, 6))
+        for amplitude in (2.0, 1.0, 0.5)
+        ]
+
+
+def wander(number, t):
+    '''Smooth pseudo-random driving, a sum of sines with random periods.'''
+    x = y = 0.0
+    for amplitude, fx, px, fy, py in _wanderWaves(number):
+        x += amplitude * math.sin(t * fx + px)
+        y += 2 * amplitude * math.sin(t * fy + py)
+    return x, y, math.sin(t * 0.3 + number) * math.pi
+
+
+MOTIONS = {
+    "static": static,
+    "circle": circle,
+    "lissajous": lissajous,
+    "wander": wander
+    }
+
+
+class UDPPublisher:
+
+    def __init__(self, count, host="127.0.0.1", port=udp.PORT):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._senders = [
+            udp.Sender(host, port + i, sock) for i in range(count)
+            ]
+        self._looks = [None] * count
+
+    def setup(self, number, size, color):
+        self._looks[number] = (size, color)
+
+    def publish(self, number, x, y, r, full=False):
+        '''full also sends the size and color, datagrams can get lost.'''
+        if full:
+            self._senders[number].send(x, y, r, *self._looks[number])
+        else:
+            self._senders[number].send(x, y, r)
+
+    def flush(self):
+        pass
+
+
+class NTPublisher:
+
+    def __init__(self, count):
+        from networktables import NetworkTables
+        from roboradar.robots.Standard import tableName
+        self._nt = NetworkTables
+        NetworkTables.initialize()
+        self._tables = [
+            NetworkTables.getTable(tableName(i)) for i in range(count)
+            ]
+
+    def setup(self, number, size, color):
+        table = self._tables[number]
+        table.putString("unitsLinear", "meter")
+        table.putNumber("boxbotW", size[0])
+        table.putNumber("boxbotH", size[1])
+        table.putNumberArray("color", color)
+
+    def publish(self, number, x, y, r, full=False):
+        table = self._tables[number]
+        table.putNumber("posX", x)
+        table.putNumber("posY", y)
+        table.putNumber("posR", r)
+
+    def flush(self):
+        self._nt.flush()
+
+
+class LoadGenerator:
+    '''Publishes robots + pieces poses rate times a second.
+With batch, every pose of a tick is published at once and flushed together,
+otherwise they are spread out evenly over the tick and each one is flushed
+on its own.'''
+
+    def __init__(self, robots=6, pieces=0, motion="circle", rate=50,
+                 transport="udp", batch=True, host="127.0.0.1",
+                 port=udp.PORT):
+        self.options = dict(
+            robots=robots,
+            pieces=pieces,
+            motion=motion,
+            rate=rate,
+            transport=transport,
+            batch=batch,
+            host=host,
+            port=port
+            )
+        self.robots = robots
+        self.pieces = pieces
+        self.motion = MOTIONS[motion]
+        self.rate = rate
+        self.transport = transport
+        self.batch = batch
+        self.host = host
+        self.port = port
+        self.sent = 0
+        self.ticks = 0
+        self.late = 0
+        self._stopped = threading.Event()
+
+    def _publisher(self):
+        count = self.robots + self.pieces
+        if self.transport == "nt":
+            return NTPublisher(count)
+        return UDPPublisher(count, self.host, self.port)
+
+    def run(self, duration=None, report=print):
+        '''Publish until stop is called or duration seconds have passed.
+report gets a line about the achieved rates every second, None turns that
+off.'''
+        publisher = self._publisher()
+        count = self.robots + self.pieces
+        for i in range(count):
+            if i < self.robots:
+                publisher.setup(i, ROBOT_SIZE, ALLIANCES[i % 2])
+            else:
+                publisher.setup(i, PIECE_SIZE, PIECE_COLOR)
+        period = 1 / self.rate
+        start = time.perf_counter()
+        lastReport = start
+        lastSent = 0
+        lastTicks = 0
+        while not self._stopped.is_set():
+            t = self.ticks * period
+            if duration is not None and t >= duration:
+                break
+            full = self.ticks % math.ceil(self.rate) == 0
+            for i in range(count):
+                if not self.batch:
+                    self._sleepUntil(start + t + period * i / count)
+                if i < self.robots:
+                    publisher.publish(i, *self.motion(i, t), full)
+                else:
+                    # Pieces roll around slowly, whatever the robots do.
+                    publisher.publish(i, *lissajous(i, t * 0.1), full)
+                if not self.batch:
+                    publisher.flush()
+            if self.batch:
+                publisher.flush()
+            self.sent += count
+            self.ticks += 1
+            if not self._sleepUntil(start + self.ticks * period):
+                self.late += 1
+            now = time.perf_counter()
+            if report is not None and now - lastReport >= 1:
+                report(
+                    "{:8.0f} poses/s of {:.0f}, {:6.1f} ticks/s of {:.1f}, "
+                    "{} late ticks".format(
+                        (self.sent - lastSent) / (now - lastReport),
+                        count * self.rate,
+                        (self.ticks - lastTicks) / (now - lastReport),
+                        self.rate,
+                        self.late
+                        ))
+                lastReport = now
+                lastSent = self.sent
+                lastTicks = self.ticks
+
+    def _sleepUntil(self, deadline):
+        '''Returns False if deadline had already passed.'''
+        delay = deadline - time.perf_counter()
+        if delay <= 0:
+            return False
+        time.sleep(delay)
+        return True
+
+    def start(self, duration=None, report=print):
+        '''Run in a thread of this process. Only for UDP, see the module
+docstring.'''
+        thread = threading.Thread(
+            target=self.run,
+            args=(duration, report),
+            name="RoboRadar load generator",
+            daemon=True
+            )
+        thread.start()
+        return thread
+
+    def spawn(self, duration=None):
+        '''Run a copy of this generator in a child process, which is
+returned. Stop it with its terminate().'''
+        process = multiprocessing.Process(
+            target=_run,
+            args=(self.options, duration),
+            name="RoboRadar load generator",
+            daemon=True
+            )
+        process.start()
+        return process
+
+    def stop(self):
+        self._stopped.set()
+
+
+def _run(options, duration):
+    LoadGenerator(**options).run(duration)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument('-n', '--robots', type=int, default=6)
+    parser.add_argument('-m', '--pieces', type=int, default=0)
+    parser.add_argument(
+        '--motion', choices=sorted(MOTIONS), default="circle")
+    parser.add_argument(
+        '-r', '--rate', type=float, default=50,
+        help="poses per second per robot, 1 to 1000")
+    parser.add_argument('-t', '--transport', choices=("udp", "nt"),
+                        default="udp")
+    parser.add_argument(
+        '--no-batch', dest="batch", action='store_false',
+        help="spread poses over each tick and flush them one at a time")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('-p', '--port', type=int, default=udp.PORT)
+    parser.add_argument(
+        '-d', '--duration', type=float, help="seconds, forever if not given")
+    options = parser.parse_args()
+    if not 1 <= options.rate <= 1000:
+        parser.error("--rate has to be between 1 and 1000")
+    generator = LoadGenerator(
+        options.robots,
+        options.pieces,
+        options.motion,
+        options.rate,
+        options.transport,
+        options.batch,
+        options.host,
+        options.port
+        )
+    print("Publishing {} robots and {} pieces over {}, start the radar with "
+          "ROBOT.COUNT set to {}".format(
+              options.robots,
+              options.pieces,
+              options.transport,
+              options.robots + options.pieces
+              ))
+    try:
+        generator.run(options.duration)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
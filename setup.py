@@ -16,7 +16,8 @@ setuptools.setup(
     url="https://github.com/Short-SirKit-6527/RoboRadar",
     install_requires=[
         "pynetworktables",
-        "pint"
+        "pint",
+        "numpy"
     ],
     packages=[
         "roboradar"
@@ -27,11 +28,14 @@ setuptools.setup(
             "icon.ico",
             "RoboRadarConfig.json",
             "utils/__init__.py",
-            "utils/dummyboxbot.py",
+            "utils/DummyBoxBot.py",
+            "utils/benchmark.py",
+            "utils/loadgen.py",
             "fields/__init__.py",
             "fields/FRC_2020.py",
             "robots/__init__.py",
-            "robots/standard.py"
+            "robots/Standard.py",
+            "robots/UDP.py"
             ]
     },
     classifiers=[
@@ -39,5 +43,5 @@ setuptools.setup(
         "License :: OSI Approved :: GNU General Public License v3 (GPLv3)",
         "Operating System :: OS Independent",
     ],
-    python_requires='>=3.6',
+    python_requires='>=3.7',
 )
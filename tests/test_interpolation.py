@@ -0,0 +1,104 @@
+import math
+import unittest
+
+from roboradar import interpolation
+
+
+def moving(speed, end, period=0.02, count=10):
+    '''count samples at period apart moving along x at speed, ending at x
+end at time 1.'''
+    return [
+        (1 - i * period, end - speed * i * period, 0.0, 0.0)
+        for i in reversed(range(count))
+        ]
+
+
+class SampleTest(unittest.TestCase):
+
+    def assertPose(self, pose, expected):
+        for a, b in zip(pose, expected):
+            self.assertAlmostEqual(a, b)
+
+    def test_empty(self):
+        self.assertIsNone(interpolation.sample((), 1, 0.05))
+
+    def test_single_sample(self):
+        samples = [(1, 2.0, 3.0, 0.5)]
+        self.assertPose(interpolation.sample(samples, 0, 0.05), (2, 3, 0.5))
+        self.assertPose(interpolation.sample(samples, 2, 0.05), (2, 3, 0.5))
+
+    def test_interpolates_between_samples(self):
+        samples = [(0, 0.0, 0.0, 0.0), (1, 2.0, 4.0, 1.0), (2, 2.0, 4.0, 1.0)]
+        self.assertPose(
+            interpolation.sample(samples, 0.25, 0.05),
+            (0.5, 1, 0.25)
+            )
+        self.assertPose(interpolation.sample(samples, 1, 0.05), (2, 4, 1))
+
+    def test_before_oldest_sample(self):
+        samples = [(1, 1.0, 1.0, 0.0), (2, 2.0, 2.0, 0.0)]
+        self.assertPose(interpolation.sample(samples, 0, 0.05), (1, 1, 0))
+
+    def test_heading_wraps_the_short_way(self):
+        samples = [(0, 0.0, 0.0, math.pi - 0.1), (1, 0.0, 0.0, -math.pi + 0.1)]
+        r = interpolation.sample(samples, 0.5, 0.05)[2]
+        self.assertAlmostEqual(math.cos(r), -1)
+        self.assertAlmostEqual(math.sin(r), 0)
+        r = interpolation.sample(samples, 0.25, 0.05)[2]
+        self.assertAlmostEqual(r, math.pi - 0.05)
+
+    def test_extrapolation_is_capped(self):
+        samples = moving(3, 3.0)
+        self.assertPose(
+            interpolation.sample(samples, 1.03, 0.05),
+            (3.09, 0, 0)
+            )
+        self.assertPose(
+            interpolation.sample(samples, 1.05, 0.05),
+            (3.15, 0, 0)
+            )
+        # Never further than the cap.
+        for i in range(100):
+            x = interpolation.sample(samples, 1 + i / 1000, 0.05)[0]
+            self.assertLessEqual(x, 3.15 + 1e-9)
+
+    def test_stopped_robot_returns_to_newest_sample(self):
+        samples = moving(3, 3.0)
+        # Back on the way to the newest sample after the cap.
+        x = interpolation.sample(samples, 1.075, 0.05)[0]
+        self.assertAlmostEqual(x, 3.075)
+        self.assertPose(interpolation.sample(samples, 1.1, 0.05), (3, 0, 0))
+        self.assertPose(interpolation.sample(samples, 5, 0.05), (3, 0, 0))
+
+    def test_reset_robot_stays_at_reset_position(self):
+        samples = [(0.98, 5.0, 5.0, 0.0), (1, 0.0, 0.0, 0.0)]
+        for t in (1.1, 1.3, 10):
+            self.assertPose(interpolation.sample(samples, t, 0.05), (0, 0, 0))
+
+    def test_no_extrapolation(self):
+        samples = moving(3, 3.0)
+        self.assertPose(interpolation.sample(samples, 1.01, 0), (3, 0, 0))
+
+
+class PoseBufferTest(unittest.TestCase):
+
+    def test_coalesces_close_updates(self):
+        buf = interpolation.PoseBuffer(coalesce=0.002)
+        buf.push(1, 1.0, 0.0, 0.0)
+        buf.push(1.001, 1.0, 2.0, 0.0)
+        buf.push(1.02, 2.0, 2.0, 0.0)
+        self.assertEqual(
+            buf.samples(),
+            ((1, 1.0, 2.0, 0.0), (1.02, 2.0, 2.0, 0.0))
+            )
+
+    def test_capacity(self):
+        buf = interpolation.PoseBuffer(capacity=4)
+        for i in range(10):
+            buf.push(i, float(i), 0.0, 0.0)
+        self.assertEqual(len(buf), 4)
+        self.assertEqual(buf.samples()[0][0], 6)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+import socket
+import threading
+import time
+import unittest
+import urllib.error
+import urllib.request
+
+from roboradar import server
+
+
+def wait_for(condition, timeout=5):
+    end = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > end:
+            raise AssertionError("timed out")
+        time.sleep(0.01)
+
+
+class FrameServerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = server.FrameServer(
+            "png",
+            maxClients=3,
+            clientTimeout=2
+            )
+        self.host, self.port = self.server.start("127.0.0.1", 0)
+        self.sockets = []
+
+    def tearDown(self):
+        for s in self.sockets:
+            s.close()
+        self.server.close()
+
+    def url(self, path):
+        return "http://127.0.0.1:{}{}".format(self.port, path)
+
+    def stream(self):
+        '''A raw /stream connection with a tiny receive buffer, so it stalls
+as soon as it stops reading.'''
+        s = socket.socket()
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        s.connect(("127.0.0.1", self.port))
+        s.sendall(b"GET /stream HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        self.sockets.append(s)
+        return s
+
+    def newClient(self, known=frozenset()):
+        '''The server side Client of a connection made after known.'''
+        wait_for(lambda: len(self.server.clients) > len(known))
+        client, = self.server.clients - known
+        return client
+
+    def test_page_and_not_found(self):
+        page = urllib.request.urlopen(self.url("/")).read()
+        self.assertIn(b'src="/stream"', page)
+        with self.assertRaises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(self.url("/missing"))
+        self.assertEqual(error.exception.code, 404)
+
+    def test_frame_waits_for_next_publish(self):
+        result = {}
+        thread = threading.Thread(target=lambda: result.update(
+            frame=urllib.request.urlopen(self.url("/frame")).read()
+            ))
+        thread.start()
+        wait_for(self.server.watched)
+        self.assertTrue(self.server.wanted())
+        self.assertFalse(self.server.wanted())
+        self.server.publish(b"frame")
+        thread.join(5)
+        self.assertEqual(result["frame"], b"frame")
+
+    def test_slow_client_drops_frames(self):
+        fast = self.stream()
+        fastClient = self.newClient()
+        self.stream()
+        slowClient = self.newClient({fastClient})
+        received = bytearray()
+        done = threading.Event()
+
+        def read():
+            fast.settimeout(0.2)
+            while not done.is_set():
+                try:
+                    data = fast.recv(1 << 20)
+                except socket.timeout:
+                    continue
+                if not data:
+                    break
+                received.extend(data)
+
+        reader = threading.Thread(target=read)
+        reader.start()
+        frame = bytes(range(256)) * 4096
+        for i in range(20):
+            self.server.publish(frame)
+            time.sleep(0.03)
+        wait_for(lambda: fastClient.sent == 20)
+        done.set()
+        reader.join()
+        self.assertEqual(fastClient.dropped, 0)
+        self.assertEqual(received.count(frame), 20)
+        # The stalled client only ever has one frame waiting, the rest are
+        # dropped instead of buffered.
+        self.assertGreater(slowClient.dropped, 10)
+        self.assertLess(slowClient.sent, 10)
+        # And it is disconnected once it hasn't taken a frame for
+        # clientTimeout seconds.
+        wait_for(lambda: slowClient not in self.server.clients)
+
+    def test_client_limit(self):
+        for i in range(3):
+            self.stream()
+        wait_for(lambda: len(self.server.clients) == 3)
+        with self.assertRaises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(self.url("/stream"))
+        self.assertEqual(error.exception.code, 503)
+
+    def test_hangup_without_frames(self):
+        s = self.stream()
+        wait_for(self.server.watched)
+        s.close()
+        wait_for(lambda: not self.server.watched())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+
+from roboradar import trail
+
+
+class TrailTest(unittest.TestCase):
+
+    def test_expire_drops_old_points(self):
+        t = trail.Trail(1, 8)
+        for i in range(4):
+            t.push(i * 0.5, float(i), 0.0)
+        self.assertFalse(t.expire(1))
+        self.assertTrue(t.expire(1.75))
+        self.assertEqual(t.points(1.75).tolist(), [[2, 0], [3, 0]])
+        self.assertEqual(len(t), 2)
+        self.assertTrue(t.expire(10))
+        self.assertEqual(len(t), 0)
+        self.assertIsNone(t.last())
+
+    def test_standing_still_adds_nothing_after_expiry(self):
+        t = trail.Trail(1, 8)
+        t.push(0, 1.0, 1.0)
+        t.expire(5)
+        self.assertFalse(t.push(5, 1.0, 1.0))
+        self.assertEqual(len(t), 0)
+        self.assertTrue(t.push(6, 2.0, 1.0))
+
+    def test_capacity(self):
+        t = trail.Trail(100, 4)
+        for i in range(10):
+            t.push(i, float(i), 0.0)
+        self.assertEqual(len(t), 4)
+        self.assertEqual(t.points(10)[:, 0].tolist(), [6, 7, 8, 9])
+        self.assertTrue(t.expire(108.5))
+        self.assertEqual(len(t), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()